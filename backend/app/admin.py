@@ -10,6 +10,7 @@ from app.models import (
     Quiz,
     Option,
     Response,
+    LessonScore,
 )
 from app.resources import (
     StudentResource,
@@ -17,6 +18,7 @@ from app.resources import (
     QuizResource,
     OptionResource,
     ResponseResource,
+    LessonScoreResource,
 )
 
 
@@ -441,3 +443,72 @@ class ResponseAdmin(ImportExportModelAdmin):
         else:
             return "-"
     verbose_summary.short_description = 'Summary'
+
+
+@admin.register(LessonScore)
+class LessonScoreAdmin(ImportExportModelAdmin):
+
+    resource_class = LessonScoreResource
+
+    ordering = (
+        'lesson',
+        'student',
+    )
+    list_display = (
+        'id',
+        'verbose_summary',
+        'student',
+        'lesson',
+        'answered',
+        'correct',
+    )
+    list_filter = (
+        'lesson',
+    )
+    search_fields = (
+        'student__personal_sid',
+        'student__personal_name',
+    )
+
+    readonly_fields = (
+        'verbose_summary',
+        'answered',
+        'correct',
+        'created_at',
+        'updated_at',
+    )
+    raw_id_fields = (
+        'student',
+        'lesson',
+    )
+    fieldsets = (
+        ('Verbose', {
+            'fields': (
+                'verbose_summary',
+            ),
+        }),
+        ('Details', {
+            'fields': (
+                'student',
+                'lesson',
+                'answered',
+                'correct',
+            ),
+        }),
+        ('Metadata', {
+            'fields': (
+                'created_at',
+                'updated_at',
+            ),
+            'classes': (
+                'collapse',
+            ),
+        }),
+    )
+
+    def verbose_summary(self, obj):
+        if obj.pk:
+            return str(obj)
+        else:
+            return "-"
+    verbose_summary.short_description = 'Summary'
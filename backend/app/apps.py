@@ -4,3 +4,6 @@ from django.apps import AppConfig as AppConfigBase
 class AppConfig(AppConfigBase):
 
     name = 'app'
+
+    def ready(self):
+        from app import signals  # noqa: F401
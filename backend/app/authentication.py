@@ -1,18 +1,22 @@
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from app import users
+
 
 User = get_user_model()
 
 
 class Authentication(JWTAuthentication):
 
+    def authenticate(self, request):
+        validated_token = getattr(request._request, 'validated_token', None)
+        if validated_token is None:
+            return super().authenticate(request)
+        return self.get_user(validated_token), validated_token
+
     def get_user(self, validated_token):
         try:
-            return (
-                User.objects
-                .select_related('student')
-                .get(id=validated_token['user_id'])
-            )
+            return users.get(validated_token['user_id'])
         except User.DoesNotExist:
             return None
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from urllib.parse import (
+    urlparse,
+    urlunparse,
+)
+
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.core.cache import cache
+
+
+SCRATCH_KEY_PREFIX = 'benchmark'
+SCRATCH_REDIS_DB = 15
+SCRATCH_CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    },
+}
+
+
+def get_scratch_caches(redis_db):
+    location = urlparse(settings.CACHES['default']['LOCATION'])
+    return {
+        **settings.CACHES,
+        'default': {
+            **settings.CACHES['default'],
+            'LOCATION': urlunparse(location._replace(path=f'/{redis_db}')),
+            'KEY_PREFIX': SCRATCH_KEY_PREFIX,
+        },
+    }
+
+
+@contextmanager
+def scratch(redis_db=SCRATCH_REDIS_DB):
+
+    # a throwaway database, redis database and channel layer, so live classes are never touched
+    old_name = connection.creation.create_test_db(
+        verbosity=0,
+        autoclobber=True,
+        serialize=False,
+    )
+    try:
+        with override_settings(
+            CACHES=get_scratch_caches(redis_db),
+            CHANNEL_LAYERS=SCRATCH_CHANNEL_LAYERS,
+        ):
+            try:
+                yield
+            finally:
+                cache.clear()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,81 @@
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django_redis import get_redis_connection
+from rest_framework_simplejwt.settings import api_settings
+
+
+BLACKLIST_KEY = 'jwt:blacklist:{}'
+
+
+def get_blacklist_key(jti):
+    return BLACKLIST_KEY.format(jti)
+
+
+def get_backend():
+    return import_string(settings.TOKEN_BLACKLIST_BACKEND)()
+
+
+class RedisBlacklist:
+
+    # one key per jti that expires with the token, so the blacklist never outgrows live tokens
+    def add(self, token):
+        return self.add_jti(token.payload[api_settings.JTI_CLAIM], token.payload['exp'])
+
+    def add_jti(self, jti, exp):
+        conn = get_redis_connection('default')
+        return bool(conn.set(
+            get_blacklist_key(jti),
+            1,
+            ex=max(int(exp - time.time()), 1),
+            nx=True,
+        ))
+
+    def add_many(self, entries):
+        conn = get_redis_connection('default')
+        now = time.time()
+        pipe = conn.pipeline(transaction=False)
+        count = 0
+        for jti, exp in entries:
+            if exp <= now:
+                continue
+            pipe.set(get_blacklist_key(jti), 1, ex=max(int(exp - now), 1))
+            count += 1
+        pipe.execute()
+        return count
+
+    def contains(self, token):
+        conn = get_redis_connection('default')
+        return bool(conn.exists(get_blacklist_key(token.payload[api_settings.JTI_CLAIM])))
+
+
+class DatabaseBlacklist:
+
+    # simplejwt's own tables, only usable with rest_framework_simplejwt.token_blacklist installed
+    def add(self, token):
+        from django.contrib.auth import get_user_model  # noqa: F401
+        from rest_framework_simplejwt.utils import datetime_from_epoch  # noqa: F401
+        from rest_framework_simplejwt.token_blacklist.models import (  # noqa: F401
+            OutstandingToken,
+            BlacklistedToken,
+        )
+        User = get_user_model()
+        user_id = token.payload.get(api_settings.USER_ID_CLAIM)
+        outstanding_token, _ = OutstandingToken.objects.get_or_create(
+            jti=token.payload[api_settings.JTI_CLAIM],
+            defaults={
+                'user': User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first(),
+                'created_at': token.current_time,
+                'token': str(token),
+                'expires_at': datetime_from_epoch(token.payload['exp']),
+            },
+        )
+        _, created = BlacklistedToken.objects.get_or_create(token=outstanding_token)
+        return created
+
+    def contains(self, token):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken  # noqa: F401
+        return BlacklistedToken.objects.filter(
+            token__jti=token.payload[api_settings.JTI_CLAIM],
+        ).exists()
@@ -0,0 +1,120 @@
+import logging
+
+from django.db import transaction
+from django_redis import get_redis_connection
+
+from app.models import (
+    User,
+    Option,
+    Response,
+)
+
+
+BUFFER_KEY = 'responses:buffer'
+FLUSHING_KEY = 'responses:flushing'
+DEAD_LETTER_KEY = 'responses:dead'
+FLUSH_LOCK_KEY = 'responses:flush:lock'
+FLUSH_SCHEDULED_KEY = 'responses:flush:scheduled'
+FLUSH_LOCK_TIMEOUT = 60
+FLUSH_BATCH_SIZE = 1000
+
+
+def push(user_id, quiz_id, option_id):
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline(transaction=True)
+    pipe.hset(BUFFER_KEY, f'{user_id}:{quiz_id}', option_id)
+    pipe.set(FLUSH_SCHEDULED_KEY, 1, nx=True, ex=FLUSH_LOCK_TIMEOUT)
+    _, is_scheduled = pipe.execute()
+    return bool(is_scheduled)
+
+
+def get_valid_responses(responses):
+
+    # rows may point at users, quizzes or options deleted since they were buffered
+    user_ids = set(
+        User.objects
+        .filter(id__in={response.user_id for response in responses})
+        .values_list('id', flat=True)
+    )
+    option_quiz_ids = dict(
+        Option.objects
+        .filter(id__in={response.option_id for response in responses})
+        .values_list('id', 'quiz_id')
+    )
+    valid = []
+    invalid = []
+    for response in responses:
+        if response.user_id in user_ids and option_quiz_ids.get(response.option_id) == response.quiz_id:
+            valid.append(response)
+        else:
+            invalid.append(response)
+    return valid, invalid
+
+
+def bury(conn, responses, reason):
+    if not responses:
+        return
+    conn.hset(DEAD_LETTER_KEY, mapping={
+        f'{response.user_id}:{response.quiz_id}': response.option_id
+        for response in responses
+    })
+    logger = logging.getLogger('django')
+    logger.error(f"Moved {len(responses)} buffered responses to {DEAD_LETTER_KEY}: {reason}")
+
+
+def flush():
+    conn = get_redis_connection('default')
+    with conn.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_TIMEOUT):
+        conn.delete(FLUSH_SCHEDULED_KEY)
+        count = 0
+        while True:
+
+            # a previous flush may have died after renaming, so retry it first
+            if not conn.exists(FLUSHING_KEY):
+                if not conn.exists(BUFFER_KEY):
+                    break
+                conn.rename(BUFFER_KEY, FLUSHING_KEY)
+
+            responses = []
+            for field, option_id in conn.hgetall(FLUSHING_KEY).items():
+                user_id, quiz_id = field.decode('utf-8').split(':')
+                responses.append(Response(
+                    user_id=int(user_id),
+                    quiz_id=int(quiz_id),
+                    option_id=int(option_id),
+                ))
+
+            # only rows that can never be stored are set aside, so a database outage leaves the batch for the next flush
+            responses, invalid = get_valid_responses(responses)
+            if invalid:
+                bury(conn, invalid, "missing user, quiz or option")
+                conn.hdel(FLUSHING_KEY, *[
+                    f'{response.user_id}:{response.quiz_id}'
+                    for response in invalid
+                ])
+            with transaction.atomic():
+                Response.objects.bulk_create(
+                    responses,
+                    batch_size=FLUSH_BATCH_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['user', 'quiz'],
+                    update_fields=['option', 'updated_at'],
+                )
+            conn.delete(FLUSHING_KEY)
+            count += len(responses)
+        return count
+
+
+def replay():
+
+    # set-aside rows go back into the buffer, without overwriting answers buffered since
+    conn = get_redis_connection('default')
+    responses = conn.hgetall(DEAD_LETTER_KEY)
+    if not responses:
+        return 0
+    pipe = conn.pipeline(transaction=True)
+    for field, option_id in responses.items():
+        pipe.hsetnx(BUFFER_KEY, field, option_id)
+    pipe.hdel(DEAD_LETTER_KEY, *responses)
+    pipe.execute()
+    return len(responses)
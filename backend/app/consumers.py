@@ -1,93 +1,319 @@
 import json
+import zlib
+import asyncio
+import logging
 
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from app import memberships
+
+
+sweeper = None
+
+
+async def run_sweeper():
+    while True:
+        try:
+            await sync_to_async(memberships.heartbeat)()
+            await sync_to_async(memberships.sweep)()
+        except Exception as e:
+            logger = logging.getLogger('channels')
+            logger.error(f"Failed to sweep channel groups: {e}")
+        await asyncio.sleep(settings.CHANNEL_SWEEP_INTERVAL)
+
+
+def ensure_sweeper():
+
+    # one heartbeat and sweep loop per worker process, started with its first socket
+    global sweeper
+    loop = asyncio.get_running_loop()
+    if sweeper is None or sweeper.done() or sweeper.get_loop() is not loop:
+        sweeper = loop.create_task(run_sweeper())
+
+
+def get_shard_group_names(group_name, shards):
+    return [f'{group_name}_{shard}' for shard in range(shards)]
+
+
+def get_shard_group_name(group_names, channel_name):
+    return group_names[zlib.crc32(channel_name.encode('utf-8')) % len(group_names)]
+
+
+async def group_send_all(channel_layer, group_names, message):
+
+    # shards are independent groups, so their fan-outs run concurrently
+    await asyncio.gather(*[
+        channel_layer.group_send(group_name, message)
+        for group_name in group_names
+    ])
+
+
+class LiveQuizConsumer(AsyncWebsocketConsumer):
+
+    GROUP_NAME = None
+    LIVE_QUIZ_TYPE = None
+
+    version = 0
+    group_names = ()
+
+    @classmethod
+    def get_group_names(cls):
+        return [cls.GROUP_NAME]
+
+    @classmethod
+    def encode_live_quiz_data(cls, quiz_data, version):
+        return json.dumps({
+            'type': cls.LIVE_QUIZ_TYPE,
+            'version': version,
+            'quiz_data': quiz_data,
+        })
+
+    @classmethod
+    def encode_live_quiz_unchanged(cls, version):
+        return json.dumps({
+            'type': f'{cls.LIVE_QUIZ_TYPE}_unchanged',
+            'version': version,
+        })
+
+    async def join_groups(self, *group_names):
+        for group_name in group_names:
+            await self.channel_layer.group_add(
+                group_name,
+                self.channel_name
+            )
+        self.group_names = group_names
+        ensure_sweeper()
+        await sync_to_async(memberships.add)(self.channel_name, group_names)
+
+    async def leave_groups(self):
+        group_names = self.group_names
+        self.group_names = ()
+        for group_name in group_names:
+            await self.channel_layer.group_discard(
+                group_name,
+                self.channel_name
+            )
+        if group_names:
+            await sync_to_async(memberships.remove)(self.channel_name, group_names)
+
+    def get_query_params(self):
+        return dict(parse_qsl(self.scope['query_string'].decode('utf-8')))
+
+    def get_client_version(self):
+        try:
+            return int(self.get_query_params()['version'])
+        except (KeyError, ValueError):
+            return None
+
+    async def send_live_quiz_data(self, client_version=None):
+        if client_version is not None:
+            version = await self.get_live_quiz_version()
+            if client_version == version:
+                self.version = version
+                await self.send(text_data=self.encode_live_quiz_unchanged(version))
+                return
+        entry = await self.get_live_quiz_entry()
+        await self.broadcast_live_quiz_data({
+            'version': entry['version'],
+            'text': self.encode_live_quiz_data(entry['data'], entry['version']),
+        })
+
+    async def broadcast_live_quiz_data(self, event):
+        if event['version'] < self.version:
+            return False
+        self.version = event['version']
+        await self.send(text_data=event['text'])
+        return True
+
+    @sync_to_async
+    def get_live_quiz_version(self):
+        from app import snapshots  # noqa: F401
+        return snapshots.get_version()
+
 
-class InstructorConsumer(AsyncWebsocketConsumer):
+class InstructorConsumer(LiveQuizConsumer):
 
     GROUP_NAME = 'instructor_group'
+    DASHBOARD_GROUP_NAME = 'instructor_dashboard_group'
+    LIVE_QUIZ_TYPE = 'instructor_live_quiz'
 
     async def connect(self):
         if not self.scope['user_data']['is_staff']:
             await self.close(code=4003)
             return
-        await self.channel_layer.group_add(
-            self.GROUP_NAME,
-            self.channel_name
-        )
+        self.is_dashboard = self.get_query_params().get('dashboard') == '1'
+        self.dashboard_buffer = {}
+        self.dashboard_flusher = None
+        self.progress_flusher = None
+        if self.is_dashboard:
+            await self.join_groups(self.GROUP_NAME, self.DASHBOARD_GROUP_NAME)
+        else:
+            await self.join_groups(self.GROUP_NAME)
         await self.accept()
-        quiz_data = await self.get_live_quiz_data()
-        await self.broadcast_live_quiz_data({
-            'quiz_data': quiz_data,
-        })
+        if self.is_dashboard:
+            await self.send_live_quiz_data()
+        else:
+            await self.send_live_quiz_data(self.get_client_version())
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.GROUP_NAME,
-            self.channel_name
-        )
+        await self.leave_groups()
+        if getattr(self, 'dashboard_flusher', None):
+            self.dashboard_flusher.cancel()
+        if getattr(self, 'progress_flusher', None):
+            self.progress_flusher.cancel()
 
     async def broadcast_live_quiz_data(self, event):
-        quiz_data = event['quiz_data']
+        is_sent = await super().broadcast_live_quiz_data(event)
+        if is_sent and self.is_dashboard:
+            dashboard_data = await self.get_dashboard_data()
+            await self.send(text_data=json.dumps({
+                'type': 'instructor_dashboard',
+                **dashboard_data,
+            }))
+
+    async def broadcast_dashboard_response(self, event):
+        self.dashboard_buffer[event['personal_sid']] = event['response']
+        if self.dashboard_flusher is None:
+            self.dashboard_flusher = asyncio.ensure_future(
+                self.flush_dashboard_responses()
+            )
+
+    async def flush_dashboard_responses(self):
+        await asyncio.sleep(settings.DASHBOARD_FLUSH_INTERVAL)
+        buffer = self.dashboard_buffer
+        self.dashboard_buffer = {}
+        self.dashboard_flusher = None
         await self.send(text_data=json.dumps({
-            'type': 'instructor_live_quiz',
-            'quiz_data': quiz_data,
+            'type': 'instructor_dashboard_delta',
+            'data': [
+                {
+                    'personal_sid': personal_sid,
+                    'response': response_data,
+                }
+                for personal_sid, response_data in buffer.items()
+            ],
+        }))
+
+    async def broadcast_progress(self, event):
+        if self.progress_flusher is None:
+            self.progress_flusher = asyncio.ensure_future(
+                self.flush_progress()
+            )
+
+    async def flush_progress(self):
+        await asyncio.sleep(settings.PROGRESS_INTERVAL)
+        self.progress_flusher = None
+        progress_data = await self.get_progress(self.is_dashboard)
+        await self.send(text_data=json.dumps({
+            'type': 'instructor_quiz_progress',
+            **progress_data,
         }))
 
     @database_sync_to_async
-    def get_live_quiz_data(self):
-        from app.models import Quiz  # noqa: F401
-        from app.serializers import QuizSerializer  # noqa: F401
-        quiz = Quiz.get_live_quiz([
-            Quiz.STATE_ACTIVE,
-            Quiz.STATE_REVIEWING,
-        ])
-        if quiz:
-            return QuizSerializer(quiz).data
-        return None
+    def get_live_quiz_entry(self):
+        from app import snapshots  # noqa: F401
+        return snapshots.get_instructor_entry()
 
+    @database_sync_to_async
+    def get_progress(self, with_users=False):
+        from app import progress  # noqa: F401
+        return progress.get_progress(with_users)
 
-class StudentConsumer(AsyncWebsocketConsumer):
+    @database_sync_to_async
+    def get_dashboard_data(self):
+        from app.dashboards import get_dashboard_data  # noqa: F401
+        return get_dashboard_data()
+
+
+class StudentConsumer(LiveQuizConsumer):
 
     GROUP_NAME = 'student_group'
+    LIVE_QUIZ_TYPE = 'student_live_quiz'
+    QUIZ_RESULTS_TYPE = 'student_quiz_results'
+
+    @classmethod
+    def get_group_names(cls):
+        return get_shard_group_names(cls.GROUP_NAME, settings.STUDENT_GROUP_SHARDS)
+
+    @classmethod
+    def encode_quiz_results(cls, results_data, version):
+        return json.dumps({
+            'type': cls.QUIZ_RESULTS_TYPE,
+            'version': version,
+            'results_data': results_data,
+        })
 
     async def connect(self):
-        await self.channel_layer.group_add(
-            self.GROUP_NAME,
-            self.channel_name
-        )
+        await self.join_groups(get_shard_group_name(
+            self.get_group_names(),
+            self.channel_name,
+        ))
         await self.accept()
-        quiz_data = await self.get_live_quiz_data()
-        await self.broadcast_live_quiz_data({
-            'quiz_data': quiz_data,
-        })
+        self.user_id = self.scope['user_data']['user_id']
+        await self.update_presence(True)
+        self.heartbeat = asyncio.ensure_future(self.send_heartbeats())
+        await self.send_live_quiz_data(self.get_client_version())
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.GROUP_NAME,
-            self.channel_name
-        )
+        await self.leave_groups()
+        if getattr(self, 'heartbeat', None):
+            self.heartbeat.cancel()
+            self.heartbeat = None
+            await self.update_presence(False)
 
-    async def broadcast_live_quiz_data(self, event):
-        quiz_data = event['quiz_data']
-        await self.send(text_data=json.dumps({
-            'type': 'student_live_quiz',
-            'quiz_data': quiz_data,
-        }))
+    async def send_live_quiz_data(self, client_version=None):
+        await super().send_live_quiz_data(client_version)
+
+        # results published along with the current live quiz data
+        entry = await self.get_quiz_results_entry()
+        if entry is not None and entry['version'] == self.version:
+            await self.send(text_data=self.encode_quiz_results(
+                entry['data'],
+                entry['version'],
+            ))
+
+    async def broadcast_quiz_results(self, event):
+        await self.broadcast_live_quiz_data(event)
 
     @database_sync_to_async
-    def get_live_quiz_data(self):
-        from app.models import Quiz  # noqa: F401
-        from app.serializers import QuizSerializer  # noqa: F401
-        quiz = Quiz.get_live_quiz([
-            Quiz.STATE_ACTIVE,
-        ])
-        if quiz:
-            return QuizSerializer(
-                instance=quiz,
-                context={
-                    'hide_answer': True,
-                },
-            ).data
-        return None
+    def get_live_quiz_entry(self):
+        from app import snapshots  # noqa: F401
+        return snapshots.get_student_entry()
+
+    async def send_heartbeats(self):
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_INTERVAL)
+            await self.touch_presence()
+
+    async def update_presence(self, is_online):
+        if await self.set_presence(is_online):
+            await self.channel_layer.group_send(InstructorConsumer.GROUP_NAME, {
+                'type': 'broadcast_progress',
+            })
+
+    @sync_to_async
+    def set_presence(self, is_online):
+        from app import (  # noqa: F401
+            presence,
+            progress,
+        )
+        if is_online:
+            presence.join(self.user_id, self.channel_name)
+        else:
+            presence.leave(self.user_id, self.channel_name)
+        return progress.should_notify()
+
+    @sync_to_async
+    def touch_presence(self):
+        from app import presence  # noqa: F401
+        presence.touch(self.user_id, self.channel_name)
+
+    @sync_to_async
+    def get_quiz_results_entry(self):
+        from app import snapshots  # noqa: F401
+        return snapshots.get_student_results_entry()
@@ -0,0 +1,60 @@
+from app import grades
+from app.models import (
+    Student,
+    Quiz,
+    Response,
+)
+from app.serializers import (
+    StudentSerializer,
+    QuizSerializer,
+    ResponseSerializer,
+)
+
+
+def get_dashboard_data():
+    data = []
+    quiz = Quiz.get_live_quiz([
+        Quiz.STATE_ACTIVE,
+        Quiz.STATE_REVIEWING,
+    ])
+    if not quiz:
+        return {
+            'quiz': None,
+            'data': [],
+        }
+    students = (
+        Student.objects
+        .select_related('user')
+        .order_by('personal_sid')
+    )
+    responses = (
+        Response.objects
+        .select_related('user', 'option')
+        .filter(quiz=quiz)
+    )
+    user_responses = {
+        response.user_id: response
+        for response in responses
+    }
+    student_datas = StudentSerializer(
+        students,
+        many=True,
+        context={
+            'quiz_count': grades.get_quiz_count(),
+        },
+    ).data
+    for student, student_data in zip(students, student_datas):
+        response = user_responses.get(student.user_id)
+        if response:
+            response_data = ResponseSerializer(response).data
+        else:
+            response_data = None
+        data.append({
+            'user_id': student.user_id,
+            'student': student_data,
+            'response': response_data,
+        })
+    return {
+        'quiz': QuizSerializer(quiz).data,
+        'data': data,
+    }
@@ -0,0 +1,222 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Q,
+    F,
+    Sum,
+    Count,
+)
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+from app import (
+    users,
+    buffers,
+    results,
+)
+from app.models import (
+    Student,
+    Lesson,
+    Quiz,
+    Response,
+    LessonScore,
+)
+
+
+SINCE_KEY = 'grades:since'
+QUIZ_COUNT_KEY = 'grades:quiz_count'
+LOCK_KEY = 'grades:lock'
+LOCK_TIMEOUT = 300
+UPDATE_BATCH_SIZE = 500
+
+
+def refresh_lesson_scores(lesson_ids, restore=False, dry_run=False):
+
+    # every quiz of a closed lesson counts, including ones sent back to pending
+    quiz_ids = list(
+        Quiz.objects
+        .filter(lesson_id__in=lesson_ids, lesson__state=Lesson.STATE_CLOSED)
+        .values_list('id', flat=True)
+    )
+
+    # result snapshots are rewritten only for quizzes that changed since they were stored
+    if restore and not dry_run:
+        results.store(results.get_stale_quiz_ids(quiz_ids))
+
+    # answered and correct counts per student and lesson, in one grouped query
+    rows = (
+        Response.objects
+        .filter(quiz_id__in=quiz_ids, user__student__isnull=False)
+        .values('user__student', 'quiz__lesson')
+        .annotate(
+            answered=Count('id'),
+            correct=Count('id', filter=Q(option__order=F('quiz__answer'))),
+        )
+        .order_by()
+    )
+    now = timezone.now()
+    scores = [
+        LessonScore(
+            student_id=row['user__student'],
+            lesson_id=row['quiz__lesson'],
+            answered=row['answered'],
+            correct=row['correct'],
+            created_at=now,
+            updated_at=now,
+        )
+        for row in rows
+    ]
+    keys = {
+        (score.student_id, score.lesson_id)
+        for score in scores
+    }
+    with transaction.atomic():
+        stale_ids = [
+            score_id
+            for score_id, student_id, lesson_id in (
+                LessonScore.objects
+                .filter(lesson_id__in=lesson_ids)
+                .values_list('id', 'student_id', 'lesson_id')
+            )
+            if (student_id, lesson_id) not in keys
+        ]
+        LessonScore.objects.filter(id__in=stale_ids).delete()
+        LessonScore.objects.bulk_create(
+            scores,
+            batch_size=UPDATE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['student', 'lesson'],
+            update_fields=['answered', 'correct', 'updated_at'],
+        )
+    return scores
+
+
+def get_scores(student_ids=None):
+    scores = LessonScore.objects.filter(
+        lesson__state=Lesson.STATE_CLOSED,
+    )
+    if student_ids is not None:
+        scores = scores.filter(student_id__in=student_ids)
+    rows = (
+        scores
+        .values('student_id')
+        .annotate(score=Sum('correct'))
+        .order_by()
+    )
+    return {
+        row['student_id']: row['score']
+        for row in rows
+    }
+
+
+def refresh_quiz_count():
+    quiz_count = Quiz.get_closed_quiz_count()
+    cache.set(QUIZ_COUNT_KEY, quiz_count, None)
+    return quiz_count
+
+
+def get_quiz_count():
+
+    # refreshed by every grading run and dropped whenever lessons or quizzes change
+    quiz_count = cache.get(QUIZ_COUNT_KEY)
+    if quiz_count is None:
+        quiz_count = refresh_quiz_count()
+    return quiz_count
+
+
+def invalidate_quiz_count():
+    cache.delete(QUIZ_COUNT_KEY)
+
+
+def get_changed_lesson_ids(since):
+
+    # lessons closed or reopened, quizzes edited, or responses edited since the last run
+    lesson_ids = set(
+        Lesson.objects
+        .filter(updated_at__gt=since)
+        .values_list('seq', flat=True)
+    )
+    lesson_ids.update(
+        Quiz.objects
+        .filter(lesson__state=Lesson.STATE_CLOSED, updated_at__gt=since)
+        .values_list('lesson_id', flat=True)
+    )
+    lesson_ids.update(
+        Response.objects
+        .filter(quiz__lesson__state=Lesson.STATE_CLOSED, updated_at__gt=since)
+        .values_list('quiz__lesson_id', flat=True)
+        .distinct()
+    )
+    return sorted(lesson_ids)
+
+
+def update_scores(lesson_ids=None, restore=False, dry_run=False):
+
+    # a dry run leaves the buffer, snapshots and cache as they are
+    if not dry_run:
+        buffers.flush()
+    is_full = lesson_ids is None
+    if is_full:
+        lesson_ids = list(Lesson.objects.values_list('seq', flat=True))
+    conn = get_redis_connection('default')
+    with conn.lock(LOCK_KEY, timeout=LOCK_TIMEOUT), transaction.atomic():
+
+        # refresh the summary rows, then re-add the students they touch
+        students = Student.objects.all()
+        if not is_full:
+            student_ids = set(
+                LessonScore.objects
+                .filter(lesson_id__in=lesson_ids)
+                .values_list('student_id', flat=True)
+            )
+        scores = refresh_lesson_scores(lesson_ids, restore=restore, dry_run=dry_run)
+        if not is_full:
+            student_ids.update(score.student_id for score in scores)
+            students = students.filter(id__in=student_ids)
+            totals = get_scores(student_ids)
+        else:
+            totals = get_scores()
+
+        changes = []
+        students = students.only(
+            'id',
+            'user_id',
+            'personal_sid',
+            'eval_quiz',
+        )
+        for student in students.order_by('personal_sid'):
+            score = totals.get(student.id, 0)
+            if student.eval_quiz == score:
+                continue
+            changes.append((student, student.eval_quiz, score))
+        if dry_run:
+            transaction.set_rollback(True)
+            return changes
+
+        # write back
+        now = timezone.now()
+        for student, _, score in changes:
+            student.eval_quiz = score
+            student.updated_at = now
+        Student.objects.bulk_update(
+            [student for student, _, _ in changes],
+            ['eval_quiz', 'updated_at'],
+            batch_size=UPDATE_BATCH_SIZE,
+        )
+        user_ids = [student.user_id for student, _, _ in changes]
+        transaction.on_commit(lambda: users.invalidate(user_ids))
+        transaction.on_commit(refresh_quiz_count)
+        return changes
+
+
+def evaluate(incremental=False, dry_run=False):
+    started_at = timezone.now()
+    since = cache.get(SINCE_KEY) if incremental else None
+    if since is None:
+        lesson_ids = None
+    else:
+        lesson_ids = get_changed_lesson_ids(since)
+    changes = update_scores(lesson_ids, restore=True, dry_run=dry_run)
+    if not dry_run:
+        cache.set(SINCE_KEY, started_at, None)
+    return changes
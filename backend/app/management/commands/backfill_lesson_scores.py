@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from app import (
+    buffers,
+    grades,
+)
+from app.models import Lesson
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild quiz result snapshots and per-lesson score summaries from the Response table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'lesson_ids',
+            nargs='*',
+            type=int,
+            help="Lessons to rebuild (default: all lessons).",
+        )
+
+    def handle(self, *args, **options):
+        buffers.flush()
+        lesson_ids = options['lesson_ids']
+        if not lesson_ids:
+            lesson_ids = list(Lesson.objects.values_list('seq', flat=True))
+        for lesson_id in lesson_ids:
+            scores = grades.refresh_lesson_scores([lesson_id], restore=True)
+            self.stdout.write(
+                f"Lesson {lesson_id}: {len(scores)} students"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled {len(lesson_ids)} lessons")
+        )
@@ -0,0 +1,69 @@
+import time
+
+from django.conf import settings
+from django.urls import reverse
+from django.test import RequestFactory
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from app.authentication import Authentication
+from project.middlewares.cookies import JWTCookieMiddleware
+
+
+User = get_user_model()
+
+
+class BenchmarkAuthentication(Authentication):
+
+    # the user lookup is the same query either way, so it is left out
+    def get_user(self, validated_token):
+        return self.user
+
+
+class LegacyBenchmarkAuthentication(BenchmarkAuthentication):
+
+    def authenticate(self, request):
+        return JWTAuthentication.authenticate(self, request)
+
+
+class Command(BaseCommand):
+
+    help = "Measure per-request JWT handling on the response submission path."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=10000,
+        )
+
+    def handle(self, *args, **options):
+        user = User(id=0, is_staff=False)
+        token = str(AccessToken.for_user(user))
+        before = self.measure(LegacyBenchmarkAuthentication, user, token, options['requests'])
+        after = self.measure(BenchmarkAuthentication, user, token, options['requests'])
+        self.stdout.write(
+            f"{options['requests']} requests"
+            f": before {before * 1000000:.1f} us"
+            f", after {after * 1000000:.1f} us"
+            " (CPU per request)"
+        )
+
+    def measure(self, authentication_class, user, token, request_count):
+        factory = RequestFactory()
+        factory.cookies[settings.SIMPLE_JWT['AUTH_COOKIE_ACCESS']] = token
+        url = reverse('app:api_student_response-list')
+        authentication = authentication_class()
+        authentication.user = user
+        middleware = JWTCookieMiddleware(
+            lambda request: authentication.authenticate(Request(request)),
+        )
+        requests = [factory.post(url) for _ in range(request_count)]
+        started = time.process_time()
+        for request in requests:
+            middleware(request)
+        elapsed = time.process_time() - started
+        return elapsed / request_count
@@ -0,0 +1,106 @@
+import json
+import time
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from app.consumers import StudentConsumer
+
+
+class LegacyStudentConsumer(StudentConsumer):
+
+    async def broadcast_live_quiz_data(self, event):
+        await self.send(text_data=json.dumps({
+            'type': self.LIVE_QUIZ_TYPE,
+            'quiz_data': event['quiz_data'],
+        }))
+
+
+class Command(BaseCommand):
+
+    help = "Measure CPU time per quiz activation spent building websocket frames."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sockets',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 5000],
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=10,
+        )
+
+    def handle(self, *args, **options):
+        quiz_data = {
+            'id': 1,
+            'lesson_id': 1,
+            'order': 1,
+            'answer': None,
+            'content': "Which of the following is correct? " * 20,
+            'image_url': '/media/quiz/00000000-0000-0000-0000-000000000000.png',
+            'state': 2,
+            'options': [
+                {
+                    'id': order,
+                    'order': order,
+                    'content': f"Option {order} " * 10,
+                }
+                for order in range(1, 5 + 1)
+            ],
+        }
+        for socket_count in options['sockets']:
+            before = self.measure(
+                LegacyStudentConsumer,
+                socket_count,
+                options['rounds'],
+                lambda: {
+                    'version': 1,
+                    'quiz_data': quiz_data,
+                },
+            )
+            after = self.measure(
+                StudentConsumer,
+                socket_count,
+                options['rounds'],
+                lambda: {
+                    'version': 1,
+                    'text': StudentConsumer.encode_live_quiz_data(quiz_data, 1),
+                },
+            )
+            self.stdout.write(
+                f"{socket_count:>6} sockets"
+                f": before {before * 1000:.2f} ms"
+                f", after {after * 1000:.2f} ms"
+                " (CPU per activation)"
+            )
+
+    def measure(self, consumer_class, socket_count, rounds, build_event):
+        frames = []
+
+        async def send(text_data=None, bytes_data=None, close=False):
+            frames.append(text_data)
+
+        consumers = []
+        for _ in range(socket_count):
+            consumer = consumer_class()
+            consumer.send = send
+            consumers.append(consumer)
+
+        async def activate():
+            event = build_event()
+            for consumer in consumers:
+                await consumer.broadcast_live_quiz_data(event)
+
+        loop = asyncio.new_event_loop()
+        try:
+            started = time.process_time()
+            for _ in range(rounds):
+                frames.clear()
+                loop.run_until_complete(activate())
+            elapsed = time.process_time() - started
+        finally:
+            loop.close()
+        return elapsed / rounds
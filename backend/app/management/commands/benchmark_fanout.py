@@ -0,0 +1,93 @@
+import time
+import asyncio
+
+from django.core.management.base import BaseCommand
+from channels.layers import get_channel_layer
+
+from app.consumers import (
+    StudentConsumer,
+    get_shard_group_names,
+    get_shard_group_name,
+    group_send_all,
+)
+
+
+GROUP_NAME = 'benchmark_student_group'
+
+
+class Command(BaseCommand):
+
+    help = "Measure activation-to-last-delivery latency of sharded student groups."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sockets',
+            type=int,
+            nargs='+',
+            default=[1000, 5000, 10000],
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            nargs='+',
+            default=[1, 4, 16],
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=3,
+        )
+
+    def handle(self, *args, **options):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            self.stderr.write("No channel layer is configured.")
+            return
+        for socket_count in options['sockets']:
+            for shard_count in options['shards']:
+                latency = asyncio.run(self.measure(
+                    channel_layer,
+                    socket_count,
+                    shard_count,
+                    options['rounds'],
+                ))
+                self.stdout.write(
+                    f"{socket_count:>6} sockets"
+                    f", {shard_count:>3} shards"
+                    f": {latency * 1000:.2f} ms"
+                    " (activation to last delivery)"
+                )
+
+    async def measure(self, channel_layer, socket_count, shard_count, rounds):
+        group_names = get_shard_group_names(GROUP_NAME, shard_count)
+        memberships = []
+        for _ in range(socket_count):
+            channel_name = await channel_layer.new_channel()
+            memberships.append((get_shard_group_name(group_names, channel_name), channel_name))
+        await asyncio.gather(*[
+            channel_layer.group_add(group_name, channel_name)
+            for group_name, channel_name in memberships
+        ])
+        message = {
+            'type': 'broadcast_live_quiz_data',
+            'version': 1,
+            'text': StudentConsumer.encode_live_quiz_data(None, 1),
+        }
+        try:
+            elapsed = 0
+            for _ in range(rounds):
+                started = time.perf_counter()
+                await asyncio.gather(
+                    group_send_all(channel_layer, group_names, message),
+                    *[
+                        channel_layer.receive(channel_name)
+                        for _, channel_name in memberships
+                    ],
+                )
+                elapsed += time.perf_counter() - started
+        finally:
+            await asyncio.gather(*[
+                channel_layer.group_discard(group_name, channel_name)
+                for group_name, channel_name in memberships
+            ])
+        return elapsed / rounds
@@ -0,0 +1,104 @@
+import time
+import asyncio
+
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+from asgiref.sync import sync_to_async
+from channels.exceptions import DenyConnection
+
+from app import tickets
+from project.middlewares.channels import ChannelsJWTAuthMiddleware
+
+
+User = get_user_model()
+
+
+class LegacyChannelsJWTAuthMiddleware(ChannelsJWTAuthMiddleware):
+
+    async def auth_ticket(self, ticket):
+        key = f'websocket:ticket:{ticket}'
+        user_data = await sync_to_async(cache.get)(key)
+        if user_data is None:
+            raise DenyConnection("Invalid ticket.")
+        await sync_to_async(cache.delete)(key)
+        return user_data
+
+    async def __call__(self, scope, receive, send):
+        close_old_connections()
+        return await super().__call__(scope, receive, send)
+
+
+def issue_legacy(user):
+    ticket = str(uuid4())
+    cache.set(
+        f'websocket:ticket:{ticket}',
+        {
+            'user_id': user.id,
+            'is_staff': user.is_staff,
+        },
+        settings.WEBSOCKET_TICKET_TTL,
+    )
+    return ticket
+
+
+class Command(BaseCommand):
+
+    help = "Measure websocket ticket handshakes per second in one worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--handshakes',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 5000],
+        )
+
+    def handle(self, *args, **options):
+        user = User(id=0, is_staff=False)
+        for handshake_count in options['handshakes']:
+            before = self.measure(
+                LegacyChannelsJWTAuthMiddleware,
+                [issue_legacy(user) for _ in range(handshake_count)],
+            )
+            after = self.measure(
+                ChannelsJWTAuthMiddleware,
+                [tickets.issue(user) for _ in range(handshake_count)],
+            )
+            self.stdout.write(
+                f"{handshake_count:>6} handshakes"
+                f": before {before:.0f}/s"
+                f", after {after:.0f}/s"
+            )
+
+    def measure(self, middleware_class, ticket_list):
+        accepted = []
+
+        async def inner(scope, receive, send):
+            accepted.append(scope['user_data'])
+
+        async def send(message):
+            pass
+
+        middleware = middleware_class(inner)
+
+        async def connect_all():
+            await asyncio.gather(*[
+                middleware({
+                    'type': 'websocket',
+                    'query_string': f'ticket={ticket}'.encode('utf-8'),
+                    'headers': [],
+                }, None, send)
+                for ticket in ticket_list
+            ])
+
+        started = time.perf_counter()
+        asyncio.run(connect_all())
+        elapsed = time.perf_counter() - started
+        if len(accepted) != len(ticket_list):
+            self.stderr.write(f"Accepted {len(accepted)} of {len(ticket_list)} handshakes.")
+        return len(ticket_list) / elapsed
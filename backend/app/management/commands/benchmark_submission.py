@@ -0,0 +1,162 @@
+import time
+
+from django.db import connection
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import (
+    APIRequestFactory,
+    force_authenticate,
+)
+
+from app import (
+    snapshots,
+    tallies,
+    benchmarks,
+)
+from app.models import (
+    Student,
+    Lesson,
+    Quiz,
+    Option,
+    Response,
+)
+from app.serializers import ResponseSerializer
+from app.viewsets import (
+    StudentResponseViewSet,
+    broadcast_dashboard_response,
+)
+
+
+TRANSACTION_STATEMENTS = (
+    'BEGIN',
+    'COMMIT',
+    'SAVEPOINT',
+    'RELEASE SAVEPOINT',
+)
+
+User = get_user_model()
+
+
+class LegacyStudentResponseViewSet(StudentResponseViewSet):
+
+    def get_serializer_class(self):
+        return ResponseSerializer
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        quiz = serializer.validated_data['quiz']
+        option = serializer.validated_data['option']
+        response, _ = Response.objects.update_or_create(
+            user=user,
+            quiz=quiz,
+            defaults={
+                'option': option,
+            },
+        )
+        serializer.instance = response
+        tallies.record(quiz.id, user.id, option.id)
+        broadcast_dashboard_response(user.student, serializer.data)
+
+
+class Command(BaseCommand):
+
+    help = "Compare queries and latency per response submission before and after the live quiz snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--students',
+            type=int,
+            default=300,
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=3,
+        )
+        parser.add_argument(
+            '--redis-db',
+            type=int,
+            default=benchmarks.SCRATCH_REDIS_DB,
+            help="Redis database used for the run, apart from the live one.",
+        )
+
+    def handle(self, *args, **options):
+        paths = {
+            'before': LegacyStudentResponseViewSet.as_view({'post': 'create'}),
+            'after': StudentResponseViewSet.as_view({'post': 'create'}),
+        }
+
+        with benchmarks.scratch(options['redis_db']):
+            quiz, users = self.prepare(options['students'])
+            for name, view in paths.items():
+                Response.objects.filter(quiz=quiz).delete()
+                tallies.rebuild(quiz.id)
+                snapshots.invalidate()
+                query_counts, latencies = self.run(view, quiz, users, options['rounds'])
+                self.report(name, query_counts, latencies)
+
+    def prepare(self, student_count):
+        lesson = Lesson.objects.create(
+            seq=1,
+            state=Lesson.STATE_ACTIVE,
+            date=timezone.localdate(),
+        )
+        quiz = Quiz.objects.create(
+            lesson=lesson,
+            order=1,
+            answer=1,
+            state=Quiz.STATE_ACTIVE,
+        )
+        Option.objects.bulk_create([
+            Option(quiz=quiz, order=order)
+            for order in range(1, 4 + 1)
+        ])
+        User.objects.bulk_create([
+            User(username=f'benchmark-{n}@benchmark.local')
+            for n in range(student_count)
+        ])
+        users = list(User.objects.filter(username__startswith='benchmark-'))
+        Student.objects.bulk_create([
+            Student(user=user, personal_sid=f'benchmark-{user.id}')
+            for user in users
+        ])
+        users = list(User.objects.filter(username__startswith='benchmark-'))
+        return quiz, users
+
+    def run(self, view, quiz, users, rounds):
+        factory = APIRequestFactory()
+        option_ids = list(quiz.options.values_list('id', flat=True))
+        query_counts = []
+        latencies = []
+        for r in range(rounds):
+            for n, user in enumerate(users):
+                request = factory.post('/api/student/responses/', {
+                    'quiz': quiz.id,
+                    'option': option_ids[(n + r) % len(option_ids)],
+                }, format='json')
+                force_authenticate(request, user=user)
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    res = view(request)
+                    latencies.append(time.perf_counter() - started)
+                assert res.status_code == 201, res.data
+                query_counts.append(len([
+                    query
+                    for query in context.captured_queries
+                    if not query['sql'].startswith(TRANSACTION_STATEMENTS)
+                ]))
+        return query_counts, latencies
+
+    def report(self, name, query_counts, latencies):
+        latencies = sorted(latencies)
+        p50 = latencies[int(len(latencies) * 0.50)] * 1000
+        p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000
+        queries = sum(query_counts) / len(query_counts)
+        self.stdout.write(
+            f"{name:>6}: {len(latencies)} submissions"
+            f", {queries:.2f} queries/submission"
+            f", p50 {p50:.2f} ms"
+            f", p99 {p99:.2f} ms"
+        )
@@ -0,0 +1,87 @@
+import time
+
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django_redis import get_redis_connection
+
+from app import benchmarks
+from app.blacklist import get_blacklist_key
+from app.tokens import RefreshToken
+from app.serializers import TokenRefreshSerializer
+
+
+User = get_user_model()
+
+SEED_BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+
+    help = "Measure refresh token rotations per second against a large blacklist history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--history',
+            type=int,
+            nargs='+',
+            default=[0, 100000, 1000000],
+        )
+        parser.add_argument(
+            '--refreshes',
+            type=int,
+            default=1000,
+        )
+        parser.add_argument(
+            '--seed-ttl',
+            type=int,
+            default=600,
+            help="Seconds the seeded historical tokens stay in Redis.",
+        )
+        parser.add_argument(
+            '--redis-db',
+            type=int,
+            default=benchmarks.SCRATCH_REDIS_DB,
+            help="Redis database used for the run, apart from the live one.",
+        )
+
+    def handle(self, *args, **options):
+        with benchmarks.scratch(options['redis_db']):
+            user = User.objects.create_user(username='benchmark@benchmark.local')
+            seeded = 0
+            for history in sorted(options['history']):
+                self.seed(history - seeded, options['seed_ttl'])
+                seeded = max(seeded, history)
+                rate = self.measure(user, options['refreshes'])
+                self.stdout.write(
+                    f"{history:>8} historical tokens"
+                    f": {rate:.0f} refreshes/s"
+                )
+
+    def seed(self, count, ttl):
+        conn = get_redis_connection('default')
+        while count > 0:
+            pipe = conn.pipeline(transaction=False)
+            for _ in range(min(count, SEED_BATCH_SIZE)):
+                pipe.set(get_blacklist_key(uuid4().hex), 1, ex=ttl)
+            pipe.execute()
+            count -= SEED_BATCH_SIZE
+
+    def measure(self, user, refreshes):
+        refresh = str(RefreshToken.for_user(user))
+        jtis = []
+        started = time.perf_counter()
+        for _ in range(refreshes):
+            serializer = TokenRefreshSerializer(data={
+                'refresh': refresh,
+            })
+            serializer.is_valid(raise_exception=True)
+            jtis.append(RefreshToken(refresh, verify=False)['jti'])
+            refresh = serializer.validated_data['refresh']
+        elapsed = time.perf_counter() - started
+
+        # drop the tokens rotated by the benchmark, so they don't count toward the next history size
+        conn = get_redis_connection('default')
+        conn.delete(*[get_blacklist_key(jti) for jti in jtis])
+        return refreshes / elapsed
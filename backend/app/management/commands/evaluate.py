@@ -1,33 +1,38 @@
 from django.core.management.base import BaseCommand
 
-from app.models import (
-    Student,
-    Lesson,
-    Quiz,
-    Response,
-)
+from app import grades
 
 
 class Command(BaseCommand):
 
+    help = "Grade quiz scores of students from closed lessons."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help="Only re-score students affected by lessons closed since the last run.",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Print score changes without writing them.",
+        )
+
     def handle(self, *args, **options):
-        students = Student.objects.all()
-        quizzes = Quiz.objects.filter(
-            lesson__state=Lesson.STATE_CLOSED,
+        changes = grades.evaluate(
+            incremental=options['incremental'],
+            dry_run=options['dry_run'],
         )
-        for student in students:
-            user = student.user
-            student.eval_quiz = 0
-            for quiz in quizzes:
-                response = Response.objects.filter(
-                    user=user,
-                    quiz=quiz,
-                ).first()
-                if not response:
-                    continue
-                if response.option.order == quiz.answer:
-                    student.eval_quiz += 1
-                student.save()
+        if options['dry_run']:
+            for student, before, after in changes:
+                self.stdout.write(
+                    f"{student.personal_sid}: {before} -> {after}"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"Would update {len(changes)} students")
+            )
+            return
         self.stdout.write(
-            self.style.SUCCESS(f"Evaluated {students.count()} students")
+            self.style.SUCCESS(f"Updated {len(changes)} students")
         )
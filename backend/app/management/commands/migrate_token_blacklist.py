@@ -0,0 +1,53 @@
+from django.apps import apps
+from django.utils import timezone
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from app.blacklist import RedisBlacklist
+
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+
+    help = "Copy unexpired blacklisted refresh tokens from simplejwt's tables into Redis."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--purge',
+            action='store_true',
+            help="Delete the outstanding and blacklisted token rows once copied.",
+        )
+
+    def handle(self, *args, **options):
+        if not apps.is_installed('rest_framework_simplejwt.token_blacklist'):
+            raise CommandError(
+                "rest_framework_simplejwt.token_blacklist is not installed, so there is nothing to migrate."
+            )
+        from rest_framework_simplejwt.token_blacklist.models import (  # noqa: F401
+            OutstandingToken,
+            BlacklistedToken,
+        )
+        backend = RedisBlacklist()
+        rows = (
+            BlacklistedToken.objects
+            .filter(token__expires_at__gt=timezone.now())
+            .values_list('token__jti', 'token__expires_at')
+            .iterator(chunk_size=BATCH_SIZE)
+        )
+        count = 0
+        batch = []
+        for jti, expires_at in rows:
+            batch.append((jti, expires_at.timestamp()))
+            if len(batch) >= BATCH_SIZE:
+                count += backend.add_many(batch)
+                batch = []
+        count += backend.add_many(batch)
+        if options['purge']:
+            OutstandingToken.objects.all().delete()
+        self.stdout.write(
+            self.style.SUCCESS(f"Migrated {count} blacklisted tokens")
+        )
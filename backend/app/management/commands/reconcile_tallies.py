@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from app import tallies
+from app.models import (
+    Lesson,
+    Quiz,
+)
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild live tally counters from the Response table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'quiz_ids',
+            nargs='*',
+            type=int,
+            help="Quizzes to rebuild (default: quizzes of the active lesson).",
+        )
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz_ids']
+        if not quiz_ids:
+            quiz_ids = list(
+                Quiz.objects
+                .filter(lesson__state=Lesson.STATE_ACTIVE)
+                .values_list('id', flat=True)
+            )
+        for quiz_id in quiz_ids:
+            counts = tallies.rebuild(quiz_id)
+            self.stdout.write(
+                f"Quiz {quiz_id}: {counts[tallies.TOTAL_FIELD]} responses"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Reconciled {len(quiz_ids)} quizzes")
+        )
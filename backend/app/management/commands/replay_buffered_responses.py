@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from app import buffers
+
+
+class Command(BaseCommand):
+
+    help = "Move buffered responses set aside by earlier flushes back into the buffer and flush them."
+
+    def handle(self, *args, **options):
+        count = buffers.replay()
+        flushed = buffers.flush()
+        self.stdout.write(
+            f"Replayed {count} buffered responses"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Flushed {flushed} responses")
+        )
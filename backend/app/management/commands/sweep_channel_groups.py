@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from app import memberships
+
+
+class Command(BaseCommand):
+
+    help = "Remove channels of dead websocket workers from their groups."
+
+    def handle(self, *args, **options):
+        count = memberships.sweep()
+        self.stdout.write(
+            f"Wasted sends so far: {memberships.get_wasted_total()}"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Swept {count} channels")
+        )
@@ -0,0 +1,109 @@
+import time
+import logging
+
+from uuid import uuid4
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+
+WORKER_ID = uuid4().hex
+WORKERS_KEY = 'channels:workers'
+MEMBERS_KEY = 'channels:worker:{}:members'
+COUNTS_KEY = 'channels:worker:{}:groups'
+WASTED_KEY = 'channels:metrics:wasted_sends'
+
+
+def get_members_key(worker_id):
+    return MEMBERS_KEY.format(worker_id)
+
+
+def get_counts_key(worker_id):
+    return COUNTS_KEY.format(worker_id)
+
+
+def heartbeat(worker_id=WORKER_ID):
+    conn = get_redis_connection('default')
+    conn.zadd(WORKERS_KEY, {worker_id: time.time() + settings.CHANNEL_WORKER_TTL})
+
+
+def add(channel_name, group_names, worker_id=WORKER_ID):
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline(transaction=True)
+    pipe.zadd(WORKERS_KEY, {worker_id: time.time() + settings.CHANNEL_WORKER_TTL})
+    pipe.hset(get_members_key(worker_id), channel_name, ','.join(group_names))
+    for group_name in group_names:
+        pipe.hincrby(get_counts_key(worker_id), group_name, 1)
+    pipe.execute()
+
+
+def remove(channel_name, group_names, worker_id=WORKER_ID):
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline(transaction=True)
+    pipe.hdel(get_members_key(worker_id), channel_name)
+    for group_name in group_names:
+        pipe.hincrby(get_counts_key(worker_id), group_name, -1)
+    pipe.execute()
+
+
+def get_dead_worker_ids():
+    conn = get_redis_connection('default')
+    return [
+        worker_id.decode('utf-8')
+        for worker_id in conn.zrangebyscore(WORKERS_KEY, '-inf', time.time())
+    ]
+
+
+def sweep():
+
+    # members of workers that stopped heartbeating are dead channels
+    channel_layer = get_channel_layer()
+    conn = get_redis_connection('default')
+    count = 0
+    for worker_id in get_dead_worker_ids():
+        members = conn.hgetall(get_members_key(worker_id))
+        for channel_name, group_names in members.items():
+            for group_name in group_names.decode('utf-8').split(','):
+                if channel_layer is not None:
+                    async_to_sync(channel_layer.group_discard)(
+                        group_name,
+                        channel_name.decode('utf-8'),
+                    )
+            count += 1
+        pipe = conn.pipeline(transaction=True)
+        pipe.delete(get_members_key(worker_id), get_counts_key(worker_id))
+        pipe.zrem(WORKERS_KEY, worker_id)
+        pipe.execute()
+    return count
+
+
+def count_wasted(group_names):
+    worker_ids = get_dead_worker_ids()
+    if not worker_ids:
+        return 0
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline(transaction=False)
+    for worker_id in worker_ids:
+        pipe.hmget(get_counts_key(worker_id), group_names)
+    return sum(
+        int(value or 0)
+        for values in pipe.execute()
+        for value in values
+    )
+
+
+def record_wasted(group_names):
+    wasted = count_wasted(group_names)
+    if wasted:
+        conn = get_redis_connection('default')
+        conn.incrby(WASTED_KEY, wasted)
+        logger = logging.getLogger('channels')
+        logger.warning(f"Wasted {wasted} sends to dead channels in {', '.join(group_names)}")
+    return wasted
+
+
+def get_wasted_total():
+    conn = get_redis_connection('default')
+    return int(conn.get(WASTED_KEY) or 0)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answered', models.PositiveSmallIntegerField(default=0, verbose_name='Answered')),
+                ('correct', models.PositiveSmallIntegerField(default=0, verbose_name='Correct')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='app.lesson', verbose_name='Lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lesson_scores', to='app.student', verbose_name='Student')),
+            ],
+            options={
+                'verbose_name': 'Lesson Score',
+                'verbose_name_plural': 'Lesson Scores',
+                'ordering': ('lesson', 'student'),
+                'unique_together': {('student', 'lesson')},
+            },
+        ),
+    ]
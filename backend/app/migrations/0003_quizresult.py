@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 13:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_lessonscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orders', models.JSONField(default=list, verbose_name='Option Orders')),
+                ('counts', models.JSONField(default=list, verbose_name='Option Counts')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+                ('correct', models.PositiveIntegerField(default=0, verbose_name='Correct')),
+                ('answered_user_ids', models.JSONField(default=list, verbose_name='Answered Users')),
+                ('correct_user_ids', models.JSONField(default=list, verbose_name='Correct Users')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='app.quiz', verbose_name='Quiz')),
+            ],
+            options={
+                'verbose_name': 'Quiz Result',
+                'verbose_name_plural': 'Quiz Results',
+                'ordering': ('quiz',),
+            },
+        ),
+    ]
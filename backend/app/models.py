@@ -1,8 +1,13 @@
 from uuid import uuid4
 from pathlib import Path
 
-from django.db import models
+from django.db import (
+    models,
+    router,
+    connections,
+)
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import (
     UserManager as BaseUserManager,
     AbstractUser,
@@ -21,6 +26,51 @@ class UserManager(BaseUserManager):
         return super().get_queryset().select_related('student')
 
 
+class ResponseManager(models.Manager):
+
+    UPSERT_VENDORS = (
+        'postgresql',
+        'sqlite',
+    )
+
+    def upsert(self, user, quiz_id, option):
+        db = self._db or router.db_for_write(self.model)
+        connection = connections[db]
+        is_native = all([
+            connection.vendor in self.UPSERT_VENDORS,
+            connection.features.can_return_columns_from_insert,
+        ])
+        if not is_native:
+            response, _ = self.update_or_create(
+                user=user,
+                quiz_id=quiz_id,
+                defaults={
+                    'option': option,
+                },
+            )
+            return response
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        now = opts.get_field('updated_at').get_db_prep_value(
+            timezone.now(),
+            connection,
+        )
+        sql = (
+            f"INSERT INTO {qn(opts.db_table)}"
+            " (user_id, quiz_id, option_id, created_at, updated_at)"
+            " VALUES (%s, %s, %s, %s, %s)"
+            " ON CONFLICT (user_id, quiz_id) DO UPDATE SET"
+            " option_id = EXCLUDED.option_id,"
+            " updated_at = EXCLUDED.updated_at"
+            " RETURNING *"
+        )
+        params = [user.id, quiz_id, option.id, now, now]
+        response = next(iter(self.raw(sql, params, using=db)))
+        response.user = user
+        response.option = option
+        return response
+
+
 class User(AbstractUser):
 
     objects = UserManager()
@@ -272,6 +322,17 @@ class Quiz(models.Model):
         )
         return quiz
 
+    @classmethod
+    def get_closed_quiz_count(cls):
+        return (
+            cls.objects
+            .filter(
+                lesson__state=Lesson.STATE_CLOSED,
+                state=cls.STATE_CLOSED,
+            )
+            .count()
+        )
+
 
 class Option(models.Model):
 
@@ -336,6 +397,8 @@ class Response(models.Model):
         verbose_name = 'Response'
         verbose_name_plural = 'Responses'
 
+    objects = ResponseManager()
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         related_name='responses',
@@ -375,3 +438,116 @@ class Response(models.Model):
             ": "
             f"Option {self.option.order}"
         )
+
+
+class LessonScore(models.Model):
+
+    class Meta:
+        ordering = (
+            'lesson',
+            'student',
+        )
+        unique_together = (
+            'student',
+            'lesson',
+        )
+        verbose_name = 'Lesson Score'
+        verbose_name_plural = 'Lesson Scores'
+
+    student = models.ForeignKey(
+        'Student',
+        related_name='lesson_scores',
+        verbose_name='Student',
+        on_delete=models.CASCADE,
+    )
+    lesson = models.ForeignKey(
+        'Lesson',
+        related_name='scores',
+        verbose_name='Lesson',
+        on_delete=models.CASCADE,
+    )
+    answered = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Answered',
+    )
+    correct = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Correct',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Created at',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated at',
+    )
+
+    def __str__(self):
+        return (
+            f"[LS {self.pk}]"
+            " "
+            f"Lesson {self.lesson_id}"
+            " / "
+            f"Student {self.student_id}"
+            ": "
+            f"{self.correct} / {self.answered}"
+        )
+
+
+class QuizResult(models.Model):
+
+    class Meta:
+        ordering = (
+            'quiz',
+        )
+        verbose_name = 'Quiz Result'
+        verbose_name_plural = 'Quiz Results'
+
+    quiz = models.OneToOneField(
+        'Quiz',
+        related_name='result',
+        verbose_name='Quiz',
+        on_delete=models.CASCADE,
+    )
+    orders = models.JSONField(
+        default=list,
+        verbose_name='Option Orders',
+    )
+    counts = models.JSONField(
+        default=list,
+        verbose_name='Option Counts',
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Total',
+    )
+    correct = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Correct',
+    )
+    answered_user_ids = models.JSONField(
+        default=list,
+        verbose_name='Answered Users',
+    )
+    correct_user_ids = models.JSONField(
+        default=list,
+        verbose_name='Correct Users',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Created at',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Updated at',
+    )
+
+    def __str__(self):
+        return (
+            f"[QR {self.pk}]"
+            " "
+            f"Quiz {self.quiz_id}"
+            ": "
+            f"{self.correct} / {self.total}"
+        )
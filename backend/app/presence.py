@@ -0,0 +1,92 @@
+import time
+
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from app import tallies
+
+
+PRESENCE_KEY = 'presence:students'
+SOCKETS_KEY = 'presence:student:{}:sockets'
+
+# keys[1]: sockets of the user (channel -> expiry), keys[2]: presence (user -> latest expiry)
+# argv[1]: channel name, argv[2]: user id, argv[3]: now
+LEAVE_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+local latest = redis.call('ZRANGE', KEYS[1], -1, -1, 'WITHSCORES')
+if latest[2] then
+    redis.call('ZADD', KEYS[2], latest[2], ARGV[2])
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+return 1
+"""
+
+
+def get_now():
+    return time.time()
+
+
+def get_sockets_key(user_id):
+    return SOCKETS_KEY.format(user_id)
+
+
+def join(user_id, channel_name):
+
+    # each socket is scored by its expiry, and the student by their latest one,
+    # so they stay online until their last tab leaves or stops heartbeating
+    expires_at = get_now() + settings.PRESENCE_TTL
+    sockets_key = get_sockets_key(user_id)
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline(transaction=True)
+    pipe.zadd(sockets_key, {channel_name: expires_at})
+    pipe.expire(sockets_key, max(settings.PRESENCE_TTL, 1))
+    pipe.zadd(PRESENCE_KEY, {user_id: expires_at})
+    pipe.execute()
+
+
+def touch(user_id, channel_name):
+    join(user_id, channel_name)
+
+
+def leave(user_id, channel_name):
+    conn = get_redis_connection('default')
+    conn.eval(
+        LEAVE_SCRIPT,
+        2,
+        get_sockets_key(user_id),
+        PRESENCE_KEY,
+        channel_name,
+        user_id,
+        get_now(),
+    )
+
+
+def get_pipeline():
+    conn = get_redis_connection('default')
+    pipe = conn.pipeline(transaction=True)
+    pipe.zremrangebyscore(PRESENCE_KEY, '-inf', get_now())
+    return pipe
+
+
+def count():
+    pipe = get_pipeline()
+    pipe.zcard(PRESENCE_KEY)
+    return pipe.execute()[-1]
+
+
+def get_user_ids():
+    pipe = get_pipeline()
+    pipe.zrange(PRESENCE_KEY, 0, -1)
+    return sorted(int(user_id) for user_id in pipe.execute()[-1])
+
+
+def get_unanswered_user_ids(quiz_id):
+    pipe = get_pipeline()
+    pipe.zrange(PRESENCE_KEY, 0, -1)
+    pipe.hkeys(tallies.get_choices_key(quiz_id))
+    _, online, answered = pipe.execute()
+    online_ids = {int(user_id) for user_id in online}
+    answered_ids = {int(user_id) for user_id in answered}
+    return sorted(online_ids - answered_ids)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from app import (
+    presence,
+    snapshots,
+    tallies,
+)
+
+
+NOTIFY_KEY = 'live_quiz:progress:notify'
+
+
+def should_notify():
+
+    # one nudge per interval; the consumers read the counters after the interval ends
+    conn = get_redis_connection('default')
+    interval = int(settings.PROGRESS_INTERVAL * 1000)
+    return bool(conn.set(NOTIFY_KEY, 1, nx=True, px=max(interval, 1)))
+
+
+def get_progress(with_users=False):
+    quiz_id = snapshots.get_submission_data()['quiz_id']
+    answered = 0
+    if quiz_id is not None:
+        conn = get_redis_connection('default')
+        answered = int(conn.hget(
+            tallies.get_tally_key(quiz_id),
+            tallies.TOTAL_FIELD,
+        ) or 0)
+    progress_data = {
+        'quiz_id': quiz_id,
+        'answered': answered,
+        'connected': presence.count(),
+    }
+    if with_users:
+        progress_data['online_user_ids'] = presence.get_user_ids()
+        if quiz_id is not None:
+            progress_data['unanswered_user_ids'] = presence.get_unanswered_user_ids(quiz_id)
+        else:
+            progress_data['unanswered_user_ids'] = progress_data['online_user_ids']
+    return progress_data
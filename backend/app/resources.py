@@ -16,6 +16,7 @@ from app.models import (
     Quiz,
     Option,
     Response,
+    LessonScore,
 )
 
 
@@ -149,3 +150,27 @@ class ResponseResource(resources.ModelResource):
         attribute='option',
         widget=ForeignKeyWidget(Option, 'id'),
     )
+
+
+class LessonScoreResource(resources.ModelResource):
+
+    class Meta:
+        model = LessonScore
+        fields = (
+            'id',
+            'student',
+            'lesson',
+            'answered',
+            'correct',
+        )
+
+    student = fields.Field(
+        column_name='student',
+        attribute='student',
+        widget=ForeignKeyWidget(Student, 'personal_sid'),
+    )
+    lesson = fields.Field(
+        column_name='lesson',
+        attribute='lesson',
+        widget=ForeignKeyWidget(Lesson, 'seq'),
+    )
@@ -0,0 +1,205 @@
+from django.core.cache import cache
+from django.db.models import (
+    F,
+    Max,
+    Count,
+)
+from django.utils import timezone
+
+from app import (
+    snapshots,
+    tallies,
+)
+from app.models import (
+    Quiz,
+    Option,
+    Response,
+    QuizResult,
+)
+
+
+RESULT_KEY = 'quiz:{}:result'
+STORE_BATCH_SIZE = 500
+
+
+def get_result_key(quiz_id):
+    return RESULT_KEY.format(quiz_id)
+
+
+def count(quiz_id):
+    rows = (
+        Option.objects
+        .filter(quiz_id=quiz_id)
+        .annotate(count=Count('responses'))
+        .order_by('order')
+        .values_list('order', 'count')
+    )
+    orders = []
+    counts = []
+    for order, option_count in rows:
+        orders.append(order)
+        counts.append(option_count)
+    return {
+        'orders': orders,
+        'counts': counts,
+        'total': sum(counts),
+    }
+
+
+def get_histogram(quiz_result):
+    return {
+        'orders': quiz_result.orders,
+        'counts': quiz_result.counts,
+        'total': quiz_result.total,
+    }
+
+
+def read_tally(quiz):
+
+    # the live counters already hold the histogram, so they are read in one round trip
+    tally = tallies.get_counts(quiz.id)
+    if tally is None:
+        return None
+    orders = []
+    counts = []
+    for option in snapshots.get_payload(quiz)['instructor']['options']:
+        orders.append(option['order'])
+        counts.append(tally.get(str(option['id']), 0))
+    return {
+        'orders': orders,
+        'counts': counts,
+        'total': sum(counts),
+    }
+
+
+def freeze(quiz):
+
+    # quizzes under review or closed take no more responses, so the snapshot never expires
+    result = read_tally(quiz)
+    if result is None:
+        result = count(quiz.id)
+    cache.set(get_result_key(quiz.id), result, None)
+    return result
+
+
+def unfreeze(quiz_id):
+    cache.delete(get_result_key(quiz_id))
+
+
+def build(quiz_ids):
+    quiz_ids = list(quiz_ids)
+    quiz_results = {
+        quiz_id: QuizResult(quiz_id=quiz_id)
+        for quiz_id in quiz_ids
+    }
+    for quiz_id, order, option_count in (
+        Option.objects
+        .filter(quiz_id__in=quiz_ids)
+        .annotate(count=Count('responses'))
+        .order_by('quiz_id', 'order')
+        .values_list('quiz_id', 'order', 'count')
+    ):
+        quiz_result = quiz_results[quiz_id]
+        quiz_result.orders.append(order)
+        quiz_result.counts.append(option_count)
+        quiz_result.total += option_count
+    responses = Response.objects.filter(quiz_id__in=quiz_ids).order_by('user_id')
+    for quiz_id, user_id in responses.values_list('quiz_id', 'user_id'):
+        quiz_results[quiz_id].answered_user_ids.append(user_id)
+    for quiz_id, user_id in (
+        responses
+        .filter(option__order=F('quiz__answer'))
+        .values_list('quiz_id', 'user_id')
+    ):
+        quiz_result = quiz_results[quiz_id]
+        quiz_result.correct += 1
+        quiz_result.correct_user_ids.append(user_id)
+    now = timezone.now()
+    for quiz_result in quiz_results.values():
+        quiz_result.created_at = now
+        quiz_result.updated_at = now
+    return list(quiz_results.values())
+
+
+def get_stale_quiz_ids(quiz_ids):
+
+    # snapshots older than their quiz or responses, or with a different total after deletes
+    quiz_ids = list(quiz_ids)
+    stored = {
+        quiz_id: (updated_at, total)
+        for quiz_id, updated_at, total in (
+            QuizResult.objects
+            .filter(quiz_id__in=quiz_ids)
+            .values_list('quiz_id', 'updated_at', 'total')
+        )
+    }
+    quiz_updated_ats = dict(
+        Quiz.objects
+        .filter(id__in=quiz_ids)
+        .values_list('id', 'updated_at')
+    )
+    response_rows = {
+        row['quiz_id']: row
+        for row in (
+            Response.objects
+            .filter(quiz_id__in=quiz_ids)
+            .values('quiz_id')
+            .annotate(total=Count('id'), updated_at=Max('updated_at'))
+            .order_by()
+        )
+    }
+    stale_ids = []
+    for quiz_id in quiz_ids:
+        if quiz_id not in stored:
+            stale_ids.append(quiz_id)
+            continue
+        stored_at, total = stored[quiz_id]
+        row = response_rows.get(quiz_id, {'total': 0, 'updated_at': None})
+        if any([
+            quiz_updated_ats[quiz_id] > stored_at,
+            row['total'] != total,
+            row['updated_at'] and row['updated_at'] > stored_at,
+        ]):
+            stale_ids.append(quiz_id)
+    return stale_ids
+
+
+def store(quiz_ids):
+    quiz_results = build(quiz_ids)
+    QuizResult.objects.bulk_create(
+        quiz_results,
+        batch_size=STORE_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['quiz'],
+        update_fields=[
+            'orders',
+            'counts',
+            'total',
+            'correct',
+            'answered_user_ids',
+            'correct_user_ids',
+            'updated_at',
+        ],
+    )
+    cache.set_many({
+        get_result_key(quiz_result.quiz_id): get_histogram(quiz_result)
+        for quiz_result in quiz_results
+    }, None)
+    return quiz_results
+
+
+def discard(quiz_id):
+    QuizResult.objects.filter(quiz_id=quiz_id).delete()
+    unfreeze(quiz_id)
+
+
+def get_frozen(quiz):
+    result = cache.get(get_result_key(quiz.id))
+    if result is not None:
+        return result
+    quiz_result = QuizResult.objects.filter(quiz_id=quiz.id).first()
+    if quiz_result is None:
+        return freeze(quiz)
+    result = get_histogram(quiz_result)
+    cache.set(get_result_key(quiz.id), result, None)
+    return result
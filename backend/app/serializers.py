@@ -6,7 +6,16 @@ from django.core.validators import validate_email
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+    TokenBlacklistSerializer as BaseTokenBlacklistSerializer,
+)
 
+from app import (
+    grades,
+    snapshots,
+)
+from app.tokens import RefreshToken
 from app.models import (
     Student,
     Lesson,
@@ -19,6 +28,16 @@ from app.models import (
 User = get_user_model()
 
 
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+
+    token_class = RefreshToken
+
+
+class TokenBlacklistSerializer(BaseTokenBlacklistSerializer):
+
+    token_class = RefreshToken
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -202,15 +221,9 @@ class StudentSerializer(serializers.ModelSerializer):
     quiz_count = serializers.SerializerMethodField()
 
     def get_quiz_count(self, obj):
-        return (
-            Quiz.objects
-            .select_related('lesson')
-            .filter(
-                lesson__state=Lesson.STATE_CLOSED,
-                state=Quiz.STATE_CLOSED,
-            )
-            .count()
-        )
+        if 'quiz_count' in self.context:
+            return self.context['quiz_count']
+        return grades.get_quiz_count()
 
     def validate_personal_sid(self, value):
         if (
@@ -348,3 +361,24 @@ class ResponseSerializer(serializers.ModelSerializer):
         if option.quiz != quiz:
             raise serializers.ValidationError("Invalid option.")
         return attrs
+
+
+class ResponseSubmitSerializer(ResponseSerializer):
+
+    quiz = serializers.IntegerField(
+        write_only=True,
+    )
+    option = serializers.IntegerField(
+        write_only=True,
+    )
+
+    def validate(self, attrs):
+        snapshot = snapshots.get_submission_data()
+        quiz_id = attrs.get('quiz')
+        if snapshot['quiz_id'] is None or quiz_id != snapshot['quiz_id']:
+            raise serializers.ValidationError("Invalid quiz.")
+        option_id = attrs.get('option')
+        if option_id not in snapshot['options']:
+            raise serializers.ValidationError("Invalid option.")
+        attrs['option_order'] = snapshot['options'][option_id]
+        return attrs
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_save,
+    post_delete,
+)
+from django.dispatch import receiver
+
+from app import (
+    users,
+    grades,
+    results,
+    snapshots,
+)
+from app.models import (
+    Student,
+    Lesson,
+    Quiz,
+    Option,
+)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def invalidate_live_quiz_snapshot(sender, **kwargs):
+    transaction.on_commit(snapshots.invalidate)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quiz_count(sender, **kwargs):
+    transaction.on_commit(grades.invalidate_quiz_count)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quiz(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'state', 'updated_at'}:
+        return
+    transaction.on_commit(lambda: snapshots.invalidate_payload(instance.id))
+    transaction.on_commit(lambda: results.discard(instance.id))
+
+
+@receiver(post_save, sender=Option)
+@receiver(post_delete, sender=Option)
+def invalidate_option(sender, instance, **kwargs):
+    transaction.on_commit(lambda: snapshots.invalidate_payload(instance.quiz_id))
+    transaction.on_commit(lambda: results.discard(instance.quiz_id))
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user(sender, instance, **kwargs):
+    users.invalidate([instance.id])
+    transaction.on_commit(lambda: users.invalidate([instance.id]))
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student(sender, instance, **kwargs):
+    users.invalidate([instance.user_id])
+    transaction.on_commit(lambda: users.invalidate([instance.user_id]))
@@ -0,0 +1,158 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from app.models import Quiz
+
+
+VERSION_KEY = 'live_quiz:version'
+SUBMISSION_KEY = 'live_quiz:submission'
+INSTRUCTOR_KEY = 'live_quiz:instructor'
+STUDENT_KEY = 'live_quiz:student'
+PAYLOAD_KEY = 'live_quiz:payload'
+STUDENT_RESULTS_KEY = 'live_quiz:student_results'
+FILL_LOCK_TIMEOUT = 5
+FILL_WAIT = 0.05
+FILL_RETRIES = 40
+
+
+def get_version():
+    return cache.get(VERSION_KEY) or 0
+
+
+def invalidate():
+    return cache.incr(VERSION_KEY, ignore_key_check=True)
+
+
+def put(key, data, version=None):
+    if version is None:
+        version = get_version()
+    entry = {
+        'version': version,
+        'data': data,
+    }
+    cache.set(key, entry, settings.LIVE_QUIZ_SNAPSHOT_TTL)
+    return entry
+
+
+def get(key, build):
+    values = cache.get_many([VERSION_KEY, key])
+    version = values.get(VERSION_KEY) or 0
+    entry = values.get(key)
+    if entry is not None and entry['version'] >= version:
+        return entry
+
+    # single-flight: one worker fills, the others wait for its result
+    lock_key = f'{key}:lock'
+    for _ in range(FILL_RETRIES):
+        if cache.add(lock_key, version, FILL_LOCK_TIMEOUT):
+            try:
+                return put(key, build(), version)
+            finally:
+                cache.delete(lock_key)
+        time.sleep(FILL_WAIT)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] >= version:
+            return entry
+    return {
+        'version': version,
+        'data': build(),
+    }
+
+
+def get_payload_key(quiz_id):
+    return f'{PAYLOAD_KEY}:{quiz_id}'
+
+
+def build_payload(quiz):
+    from app.serializers import QuizSerializer  # noqa: F401
+    return {
+        'instructor': QuizSerializer(quiz).data,
+        'student': QuizSerializer(
+            instance=quiz,
+            context={
+                'hide_answer': True,
+            },
+        ).data,
+    }
+
+
+def prewarm_payloads(quizzes):
+    cache.set_many({
+        get_payload_key(quiz.id): build_payload(quiz)
+        for quiz in quizzes
+    }, settings.LIVE_QUIZ_SNAPSHOT_TTL)
+
+
+def invalidate_payload(quiz_id):
+    cache.delete(get_payload_key(quiz_id))
+
+
+def get_payload(quiz, state=None):
+    key = get_payload_key(quiz.id)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_payload(quiz)
+        cache.set(key, payload, settings.LIVE_QUIZ_SNAPSHOT_TTL)
+
+    # the state is the only field that moves while a lesson is running
+    if state is None:
+        state = quiz.state
+    return {
+        'instructor': dict(payload['instructor'], state=state),
+        'student': dict(payload['student'], state=state),
+    }
+
+
+def build_submission_data():
+    quiz = Quiz.get_live_quiz([
+        Quiz.STATE_ACTIVE,
+    ])
+    if not quiz:
+        return {
+            'quiz_id': None,
+            'options': {},
+        }
+    return {
+        'quiz_id': quiz.id,
+        'options': {
+            option.id: option.order
+            for option in quiz.options.all()
+        },
+    }
+
+
+def build_instructor_data():
+    quiz = Quiz.get_live_quiz([
+        Quiz.STATE_ACTIVE,
+        Quiz.STATE_REVIEWING,
+    ])
+    if quiz:
+        return get_payload(quiz)['instructor']
+    return None
+
+
+def build_student_data():
+    quiz = Quiz.get_live_quiz([
+        Quiz.STATE_ACTIVE,
+    ])
+    if quiz:
+        return get_payload(quiz)['student']
+    return None
+
+
+def get_submission_data():
+    return get(SUBMISSION_KEY, build_submission_data)['data']
+
+
+def get_instructor_entry():
+    return get(INSTRUCTOR_KEY, build_instructor_data)
+
+
+def get_student_entry():
+    return get(STUDENT_KEY, build_student_data)
+
+
+def get_student_results_entry():
+    return cache.get(STUDENT_RESULTS_KEY)
@@ -0,0 +1,174 @@
+from django.conf import settings
+from django_redis import get_redis_connection
+
+from app import buffers
+from app.models import Response
+
+
+TOTAL_FIELD = 'total'
+REBUILD_TIMEOUT = 60
+
+# keys[1]: choices (user -> option), keys[2]: tally (option -> count)
+# keys[3]: rebuilds in flight, keys[4]: choices recorded while rebuilding
+# argv[1]: user id, argv[2]: option id, argv[3]: ttl, argv[4]: rebuild timeout
+RECORD_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[4], ARGV[4])
+    if redis.call('EXISTS', KEYS[2]) == 0 then
+        return 0
+    end
+elseif redis.call('EXISTS', KEYS[2]) == 0 then
+    return -1
+end
+local previous = redis.call('HGET', KEYS[1], ARGV[1])
+if previous == ARGV[2] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+if previous then
+    redis.call('HINCRBY', KEYS[2], previous, -1)
+else
+    redis.call('HINCRBY', KEYS[2], 'total', 1)
+end
+redis.call('HINCRBY', KEYS[2], ARGV[2], 1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return 1
+"""
+
+# keys[1..4]: as above, keys[5]: flushing buffer, keys[6]: response buffer
+# argv[1]: quiz id, argv[2]: ttl, argv[3..]: user id and option id pairs read from the database
+REBUILD_SCRIPT = """
+local choices = {}
+for i = 3, #ARGV, 2 do
+    choices[ARGV[i]] = ARGV[i + 1]
+end
+for _, key in ipairs({KEYS[5], KEYS[6], KEYS[4]}) do
+    local rows = redis.call('HGETALL', key)
+    for i = 1, #rows, 2 do
+        local user_id, quiz_id = string.match(rows[i], '^(%d+):(%d+)$')
+        if key == KEYS[4] then
+            choices[rows[i]] = rows[i + 1]
+        elseif quiz_id == ARGV[1] then
+            choices[user_id] = rows[i + 1]
+        end
+    end
+end
+local counts = {}
+local total = 0
+redis.call('DEL', KEYS[1], KEYS[2])
+for user_id, option_id in pairs(choices) do
+    redis.call('HSET', KEYS[1], user_id, option_id)
+    counts[option_id] = (counts[option_id] or 0) + 1
+    total = total + 1
+end
+redis.call('HSET', KEYS[2], 'total', total)
+for option_id, count in pairs(counts) do
+    redis.call('HSET', KEYS[2], option_id, count)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+if redis.call('DECR', KEYS[3]) <= 0 then
+    redis.call('DEL', KEYS[3], KEYS[4])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+
+def get_choices_key(quiz_id):
+    return f'quiz:{quiz_id}:choices'
+
+
+def get_tally_key(quiz_id):
+    return f'quiz:{quiz_id}:tally'
+
+
+def get_rebuilding_key(quiz_id):
+    return f'quiz:{quiz_id}:tally:rebuilding'
+
+
+def get_recorded_key(quiz_id):
+    return f'quiz:{quiz_id}:tally:recorded'
+
+
+def record(quiz_id, user_id, option_id):
+    conn = get_redis_connection('default')
+    result = conn.eval(
+        RECORD_SCRIPT,
+        4,
+        get_choices_key(quiz_id),
+        get_tally_key(quiz_id),
+        get_rebuilding_key(quiz_id),
+        get_recorded_key(quiz_id),
+        user_id,
+        option_id,
+        settings.TALLY_TTL,
+        REBUILD_TIMEOUT,
+    )
+
+    # a missing tally is rebuilt from stored and buffered responses, which already hold this one
+    if result == -1:
+        rebuild(quiz_id)
+    return result
+
+
+def get_counts(quiz_id):
+    conn = get_redis_connection('default')
+    tally = conn.hgetall(get_tally_key(quiz_id))
+    if not tally:
+        return None
+    return {
+        key.decode('utf-8'): int(value)
+        for key, value in tally.items()
+    }
+
+
+def get_buffered_choices(conn, quiz_id):
+    choices = {}
+    for key in (buffers.FLUSHING_KEY, buffers.BUFFER_KEY):
+        for field, option_id in conn.hgetall(key).items():
+            user_id, field_quiz_id = field.decode('utf-8').split(':')
+            if int(field_quiz_id) == quiz_id:
+                choices[int(user_id)] = int(option_id)
+    return choices
+
+
+def rebuild(quiz_id):
+    conn = get_redis_connection('default')
+    rebuilding_key = get_rebuilding_key(quiz_id)
+
+    # responses recorded from here on are kept aside and replayed over the rebuilt tally
+    pipe = conn.pipeline(transaction=True)
+    pipe.incr(rebuilding_key)
+    pipe.expire(rebuilding_key, REBUILD_TIMEOUT)
+    pipe.execute()
+
+    # buffered responses may be flushed while the table is read, so take them first
+    buffered = get_buffered_choices(conn, quiz_id)
+    choices = dict(
+        Response.objects
+        .filter(quiz_id=quiz_id)
+        .values_list('user_id', 'option_id')
+    )
+    choices.update(buffered)
+    args = []
+    for user_id, option_id in choices.items():
+        args += [user_id, option_id]
+    tally = conn.eval(
+        REBUILD_SCRIPT,
+        6,
+        get_choices_key(quiz_id),
+        get_tally_key(quiz_id),
+        rebuilding_key,
+        get_recorded_key(quiz_id),
+        buffers.FLUSHING_KEY,
+        buffers.BUFFER_KEY,
+        quiz_id,
+        settings.TALLY_TTL,
+        *args,
+    )
+    return {
+        key.decode('utf-8'): int(value)
+        for key, value in zip(tally[::2], tally[1::2])
+    }
@@ -1,6 +1,12 @@
+from django.db import DatabaseError
 from django.core.mail import send_mail
 from celery import shared_task
 
+from app import (
+    buffers,
+    grades,
+)
+
 
 @shared_task
 def send_email(
@@ -18,3 +24,23 @@ def send_email(
         html_message=html_message,
         fail_silently=False,
     )
+
+
+@shared_task(
+    autoretry_for=(DatabaseError,),
+    retry_backoff=True,
+)
+def flush_responses():
+    return buffers.flush()
+
+
+@shared_task(bind=True)
+def grade_lesson(self, lesson_id):
+    self.update_state(state='PROGRESS', meta={
+        'lesson_id': lesson_id,
+    })
+    changes = grades.update_scores([lesson_id])
+    return {
+        'lesson_id': lesson_id,
+        'updated': len(changes),
+    }
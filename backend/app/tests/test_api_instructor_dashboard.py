@@ -1,12 +1,20 @@
+from django.db import connection
 from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.test.utils import CaptureQueriesContext
 
 from app.models import (
+    Student,
     Lesson,
     Quiz,
+    Response,
 )
 from app.tests.utils import AppTestCase
 
 
+User = get_user_model()
+
+
 class APIInstructorDashboardTestCase(AppTestCase):
 
     url_name = 'app:api_instructor_dashboard'
@@ -113,3 +121,52 @@ class APIInstructorDashboardTestCase(AppTestCase):
                 row['response']['quiz_id'],
                 self.quiz.id,
             )
+
+    def test_GET_success__constant_queries(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz.state = Quiz.STATE_ACTIVE
+        self.quiz.save()
+
+        # warm authenticated user
+        self.set_at(self.user)
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # count queries with the initial roster
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        query_count = len(context.captured_queries)
+
+        # enlarge roster
+        option = self.quiz.options.first()
+        for n in range(10):
+            user = User.objects.create_user(
+                username=f'roster{n}@test.ac.kr',
+                password=f'test_roster{n}_password',
+            )
+            Student.objects.create(
+                user=user,
+                personal_sid=f'2025-1000{n}',
+            )
+            Response.objects.create(
+                user=user,
+                quiz=self.quiz,
+                option=option,
+            )
+
+        # count queries with the enlarged roster
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            len(res.data['data']),
+            len(self.normal_users) + 10,
+        )
+        self.assertEqual(
+            len(context.captured_queries),
+            query_count,
+        )
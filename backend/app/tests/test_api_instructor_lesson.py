@@ -1,8 +1,18 @@
+from unittest import mock
+
 from django.urls import reverse
+from django.core.cache import cache
+from django.test import override_settings
 
+from app import (
+    grades,
+    snapshots,
+)
+from app.tasks import grade_lesson
 from app.models import (
     Lesson,
     Quiz,
+    Option,
 )
 from app.tests.utils import AppTestCase
 
@@ -87,6 +97,10 @@ class APIInstructorLessonDetailTestCase(AppTestCase):
         self.assertEqual(res.data['seq'], self.lesson.seq)
 
 
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
 class APIInstructorLessonActivateTestCase(AppTestCase):
 
     url_name = 'app:api_instructor_lesson-activate'
@@ -144,7 +158,75 @@ class APIInstructorLessonActivateTestCase(AppTestCase):
             ],
         ).count(), 0)
 
+    def test_POST_success__reopen(self):
+
+        # prepare data
+        Lesson.objects.update(state=Lesson.STATE_CLOSED)
+        Quiz.objects.update(state=Quiz.STATE_CLOSED)
+        grades.evaluate()
+        updated_at = Lesson.objects.get(seq=self.lesson_next.seq).updated_at
+
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # check data
+        self.lesson_next.refresh_from_db()
+        self.assertGreater(self.lesson_next.updated_at, updated_at)
+        for student in self.students.values():
+            student.refresh_from_db()
+            self.assertEqual(student.eval_quiz, 1)
+
+    def test_POST_success__enqueue_fail(self):
+
+        # request data
+        self.set_at(self.user)
+        with mock.patch.object(grade_lesson, 'delay', side_effect=ConnectionError):
+            res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.state, Lesson.STATE_ACTIVE)
+
+    def test_POST_success__prewarm(self):
 
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # check payloads
+        quizzes = list(self.lesson.quizzes.all())
+        self.assertGreater(len(quizzes), 0)
+        for quiz in quizzes:
+            payload = cache.get(snapshots.get_payload_key(quiz.id))
+            self.assertEqual(payload['instructor']['id'], quiz.id)
+            self.assertEqual(payload['instructor']['answer'], quiz.answer)
+            self.assertIsNone(payload['student']['answer'])
+            self.assertEqual(
+                len(payload['student']['options']),
+                quiz.options.count(),
+            )
+
+        # edit option
+        option = Option.objects.filter(quiz__lesson=self.lesson).first()
+        option.content = "Edited"
+        option.save()
+        self.assertIsNone(cache.get(snapshots.get_payload_key(option.quiz_id)))
+
+        # edit quiz
+        quiz = quizzes[0]
+        self.client.post(self.url)
+        self.assertIsNotNone(cache.get(snapshots.get_payload_key(quiz.id)))
+        quiz.content = "Edited"
+        quiz.save()
+        self.assertIsNone(cache.get(snapshots.get_payload_key(quiz.id)))
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
 class APIInstructorLessonCloseTestCase(AppTestCase):
 
     url_name = 'app:api_instructor_lesson-close'
@@ -201,3 +283,32 @@ class APIInstructorLessonCloseTestCase(AppTestCase):
                 Quiz.STATE_REVIEWING,
             ],
         ).count(), 0)
+
+    def test_POST_success__grade(self):
+
+        # prepare data
+        self.lesson.quizzes.update(state=Quiz.STATE_CLOSED)
+
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # grade repeatedly, counting the previous lesson closed along the way
+        for _ in range(2):
+            result = grade_lesson.apply(args=[self.lesson.seq])
+            self.assertEqual(result.status, 'SUCCESS')
+            for student in self.students.values():
+                student.refresh_from_db()
+                self.assertEqual(student.eval_quiz, 2)
+
+        # regrade after an answer change
+        quiz = self.quizzes[(2, 1)]
+        quiz.refresh_from_db()
+        quiz.answer = 2
+        quiz.save()
+        grade_lesson.apply(args=[self.lesson.seq])
+        self.students[1].refresh_from_db()
+        self.students[2].refresh_from_db()
+        self.assertEqual(self.students[1].eval_quiz, 1)
+        self.assertEqual(self.students[2].eval_quiz, 3)
@@ -1,9 +1,25 @@
+from unittest import mock
+
+from django.db import (
+    connection,
+    OperationalError,
+)
 from django.urls import reverse
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django_redis import get_redis_connection
 
+from app import (
+    buffers,
+    tallies,
+)
 from app.models import (
     Lesson,
     Quiz,
+    Response,
+    QuizResult,
 )
+from app.tasks import grade_lesson
 from app.tests.utils import AppTestCase
 
 
@@ -127,6 +143,10 @@ class APIInstructorQuizDetailTestCase(AppTestCase):
         self.assertEqual(res.status_code, 404)
 
 
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
 class APIInstructorQuizActivateTestCase(AppTestCase):
 
     url_name = 'app:api_instructor_quiz-activate'
@@ -178,6 +198,28 @@ class APIInstructorQuizActivateTestCase(AppTestCase):
         self.assertEqual(self.quiz.state, Quiz.STATE_ACTIVE)
         self.assertEqual(self.quiz_next.state, Quiz.STATE_PENDING)
 
+    def test_POST_success__result(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz_prev.state = Quiz.STATE_ACTIVE
+        self.quiz_prev.save()
+        user = self.normal_users[1]
+        Response.objects.filter(user=user, quiz=self.quiz_prev).delete()
+        buffers.push(user.id, self.quiz_prev.id, self.options[(1, 1, 2)].id)
+
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # the quiz skipped past is stored with its buffered responses
+        quiz_result = QuizResult.objects.get(quiz=self.quiz_prev)
+        self.assertEqual(quiz_result.counts, [0, 2])
+        self.assertEqual(quiz_result.total, 2)
+        self.assertFalse(QuizResult.objects.filter(quiz=self.quiz).exists())
+
     def test_POST_fail__closed_lesson(self):
 
         # prepare data
@@ -190,6 +232,10 @@ class APIInstructorQuizActivateTestCase(AppTestCase):
         self.assertEqual(res.status_code, 404)
 
 
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
 class APIInstructorQuizReviewTestCase(AppTestCase):
 
     url_name = 'app:api_instructor_quiz-review'
@@ -252,7 +298,92 @@ class APIInstructorQuizReviewTestCase(AppTestCase):
         res = self.client.post(self.url)
         self.assertEqual(res.status_code, 404)
 
+    def test_POST_success__drain_buffer(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        user = self.normal_users[1]
+        option = self.quiz.options.last()
+        Response.objects.filter(user=user, quiz=self.quiz).delete()
+        buffers.push(user.id, self.quiz.id, option.id)
+
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # check data
+        response = Response.objects.get(user=user, quiz=self.quiz)
+        self.assertEqual(response.option_id, option.id)
+
+    def test_POST_success__drain_buffer_deleted_option(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        user, user_other = self.normal_users[1], self.normal_users[2]
+        option, option_deleted = self.quiz.options.first(), self.quiz.options.last()
+        Response.objects.filter(quiz=self.quiz).delete()
+        buffers.push(user.id, self.quiz.id, option.id)
+        option_deleted_id = option_deleted.id
+        buffers.push(user_other.id, self.quiz.id, option_deleted_id)
+        option_deleted.delete()
 
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # check data
+        response = Response.objects.get(user=user, quiz=self.quiz)
+        self.assertEqual(response.option_id, option.id)
+        self.assertFalse(Response.objects.filter(user=user_other, quiz=self.quiz).exists())
+
+        # check buffers
+        conn = get_redis_connection('default')
+        self.assertFalse(conn.exists(buffers.FLUSHING_KEY))
+        self.assertEqual(
+            conn.hget(buffers.DEAD_LETTER_KEY, f'{user_other.id}:{self.quiz.id}'),
+            str(option_deleted_id).encode('utf-8'),
+        )
+
+        # later flushes keep working
+        buffers.push(user_other.id, self.quiz.id, option.id)
+        self.assertEqual(buffers.flush(), 1)
+
+    def test_POST_fail__drain_buffer_database_error(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        user = self.normal_users[1]
+        option = self.quiz.options.last()
+        Response.objects.filter(user=user, quiz=self.quiz).delete()
+        buffers.push(user.id, self.quiz.id, option.id)
+
+        # a failed write keeps the batch
+        with mock.patch.object(Response.objects, 'bulk_create', side_effect=OperationalError):
+            with self.assertRaises(OperationalError):
+                buffers.flush()
+        conn = get_redis_connection('default')
+        self.assertEqual(
+            conn.hget(buffers.FLUSHING_KEY, f'{user.id}:{self.quiz.id}'),
+            str(option.id).encode('utf-8'),
+        )
+        self.assertFalse(conn.exists(buffers.DEAD_LETTER_KEY))
+
+        # and the next flush retries it
+        self.assertEqual(buffers.flush(), 1)
+        self.assertFalse(conn.exists(buffers.FLUSHING_KEY))
+        response = Response.objects.get(user=user, quiz=self.quiz)
+        self.assertEqual(response.option_id, option.id)
+
+
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
 class APIInstructorQuizCloseTestCase(AppTestCase):
 
     url_name = 'app:api_instructor_quiz-close'
@@ -304,6 +435,51 @@ class APIInstructorQuizCloseTestCase(AppTestCase):
         self.assertEqual(self.quiz.state, Quiz.STATE_CLOSED)
         self.assertEqual(self.quiz_next.state, Quiz.STATE_PENDING)
 
+    def test_POST_success__no_grading(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+
+        # grading waits until the lesson closes
+        self.set_at(self.user)
+        with mock.patch.object(grade_lesson, 'delay') as delay:
+            res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+        delay.assert_not_called()
+
+    def test_POST_success__result(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+
+        # request data
+        self.set_at(self.user)
+        res = self.client.post(self.url)
+        self.assertEqual(res.status_code, 200)
+
+        # check data
+        quiz_result = QuizResult.objects.get(quiz=self.quiz)
+        self.assertEqual(quiz_result.orders, [1, 2])
+        self.assertEqual(quiz_result.counts, [1, 1])
+        self.assertEqual(quiz_result.total, 2)
+        self.assertEqual(quiz_result.correct, 1)
+        self.assertEqual(
+            sorted(quiz_result.answered_user_ids),
+            sorted(user.id for user in self.normal_users.values()),
+        )
+        self.assertEqual(
+            quiz_result.correct_user_ids,
+            [self.normal_users[2].id],
+        )
+
+        # editing the quiz drops the snapshot
+        self.quiz.refresh_from_db()
+        self.quiz.answer = 1
+        self.quiz.save()
+        self.assertFalse(QuizResult.objects.filter(quiz=self.quiz).exists())
+
     def test_POST_fail__closed_lesson(self):
 
         # prepare data
@@ -366,6 +542,75 @@ class APIInstructorQuizResultsTestCase(AppTestCase):
                 response_count += 1
         self.assertEqual(res.data['total'], response_count)
 
+    def test_GET_success__frozen(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz.state = Quiz.STATE_REVIEWING
+        self.quiz.save()
+
+        # get data
+        self.set_at(self.user)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        count_queries = [
+            query
+            for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ]
+        self.assertEqual(len(count_queries), 1)
+
+        # check data
+        options = self.quiz.options.order_by('order')
+        self.assertEqual(
+            res.data['orders'],
+            [option.order for option in options],
+        )
+        self.assertEqual(
+            res.data['counts'],
+            [option.responses.count() for option in options],
+        )
+        self.assertEqual(res.data['total'], sum(res.data['counts']))
+
+        # later writes do not change the snapshot
+        Response.objects.filter(quiz=self.quiz).delete()
+        with CaptureQueriesContext(connection) as context:
+            frozen_res = self.client.get(self.url)
+        self.assertEqual(frozen_res.data, res.data)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+    def test_GET_success__tally(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz.state = Quiz.STATE_REVIEWING
+        self.quiz.save()
+        tallies.rebuild(self.quiz.id)
+
+        # live counters are read instead of counting responses
+        self.set_at(self.user)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+
+        # check data
+        options = self.quiz.options.order_by('order')
+        self.assertEqual(
+            res.data['orders'],
+            [option.order for option in options],
+        )
+        self.assertEqual(
+            res.data['counts'],
+            [option.responses.count() for option in options],
+        )
+        self.assertEqual(res.data['total'], sum(res.data['counts']))
+
     def test_GET_fail__closed_lesson(self):
 
         # prepare data
@@ -49,6 +49,12 @@ class APIStudentMeTestCase(AppTestCase):
             self.student.personal_sid,
         )
 
+        # get data again (user and quiz count are cached)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
     def test_PATCH_success__empty(self):
         self.set_at(self.user)
         res = self.client.patch(self.url, {})
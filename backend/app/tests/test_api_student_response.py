@@ -1,5 +1,20 @@
-from django.urls import reverse
+import random
+
+from io import StringIO
+from unittest import mock
 
+from django.db import connection
+from django.urls import reverse
+from django.test import override_settings
+from django.core.management import call_command
+from django.test.utils import CaptureQueriesContext
+from django_redis import get_redis_connection
+
+from app import (
+    buffers,
+    tallies,
+)
+from app.authentication import Authentication
 from app.models import (
     Lesson,
     Quiz,
@@ -8,6 +23,15 @@ from app.models import (
 from app.tests.utils import AppTestCase
 
 
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return 'replica'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+
 class APIStudentResponseListTestCase(AppTestCase):
 
     url_name = 'app:api_student_response-list'
@@ -321,6 +345,156 @@ class APIStudentResponseListTestCase(AppTestCase):
         })
         self.assertEqual(res.status_code, 400)
 
+    def test_POST_success__single_write(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz.state = Quiz.STATE_ACTIVE
+        self.quiz.save()
+
+        # warm live quiz snapshot
+        self.set_at(self.user)
+        res = self.client.post(self.url, data={
+            'quiz': self.quiz.id,
+            'option': self.option.id,
+        })
+        self.assertEqual(res.status_code, 201)
+
+        # update data
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.post(self.url, data={
+                'quiz': self.quiz.id,
+                'option': self.option_other.id,
+            })
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data['id'], self.response.id)
+        self.assertEqual(res.data['option_order'], self.option_other.order)
+
+        # check queries (upsert only, the authenticated user is cached)
+        sqls = [
+            query['sql']
+            for query in context.captured_queries
+            if query['sql'] not in ('BEGIN', 'COMMIT')
+        ]
+        self.assertEqual(len(sqls), 1)
+        self.assertTrue(sqls[-1].startswith('INSERT'))
+
+    @override_settings(
+        DATABASE_ROUTERS=[f'{__name__}.ReplicaRouter'],
+    )
+    def test_POST_success__upsert_primary(self):
+
+        # upserts go to the write database even when reads are routed elsewhere
+        response = Response.objects.upsert(self.user, self.quiz.id, self.option_other)
+        self.assertEqual(response.id, self.response.id)
+        self.response.refresh_from_db(using='default')
+        self.assertEqual(self.response.option_id, self.option_other.id)
+
+    def test_POST_success__decode_once(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz.state = Quiz.STATE_ACTIVE
+        self.quiz.save()
+
+        # the token validated by the cookie middleware is reused
+        self.set_at(self.user)
+        with mock.patch.object(Authentication, 'get_validated_token') as get_validated_token:
+            res = self.client.post(self.url, data={
+                'quiz': self.quiz.id,
+                'option': self.option_other.id,
+            })
+        self.assertEqual(res.status_code, 201)
+        get_validated_token.assert_not_called()
+
+    @override_settings(
+        CELERY_TASK_ALWAYS_EAGER=True,
+        CELERY_TASK_EAGER_PROPAGATES=True,
+    )
+    def test_POST_success__tally(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.set_at(self.admin_user)
+        res = self.client.post(reverse('app:api_instructor_quiz-activate', args=[
+            self.quiz.id,
+        ]))
+        self.assertEqual(res.status_code, 200)
+
+        # submit and change responses randomly
+        options = [self.option, self.option_other]
+        for _ in range(20):
+            user = random.choice(list(self.normal_users.values()))
+            option = random.choice(options)
+            self.set_at(user)
+            res = self.client.post(self.url, data={
+                'quiz': self.quiz.id,
+                'option': option.id,
+            })
+            self.assertEqual(res.status_code, 201)
+
+        # check counters against db
+        def assert_tally_agrees():
+            counts = tallies.get_counts(self.quiz.id)
+            self.assertEqual(
+                counts[tallies.TOTAL_FIELD],
+                Response.objects.filter(quiz=self.quiz).count(),
+            )
+            for option in options:
+                self.assertEqual(
+                    counts.get(str(option.id), 0),
+                    Response.objects.filter(option=option).count(),
+                )
+        assert_tally_agrees()
+
+        # reconcile after losing counters
+        get_redis_connection('default').delete(
+            tallies.get_tally_key(self.quiz.id),
+        )
+        self.assertIsNone(tallies.get_counts(self.quiz.id))
+        call_command('reconcile_tallies', self.quiz.id, stdout=StringIO())
+        assert_tally_agrees()
+
+    def test_POST_success__tally_rebuild(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        self.lesson.save()
+        self.quiz.state = Quiz.STATE_ACTIVE
+        self.quiz.save()
+        other_user = self.normal_users[2]
+        buffers.push(other_user.id, self.quiz.id, self.option.id)
+
+        # a missing tally is rebuilt with buffered responses
+        self.set_at(self.user)
+        res = self.client.post(self.url, data={
+            'quiz': self.quiz.id,
+            'option': self.option_other.id,
+        })
+        self.assertEqual(res.status_code, 201)
+        self.assertDictEqual(tallies.get_counts(self.quiz.id), {
+            str(self.option.id): 1,
+            str(self.option_other.id): 1,
+            tallies.TOTAL_FIELD: 2,
+        })
+
+        # responses recorded while rebuilding are kept
+        def record(conn, quiz_id):
+            tallies.record(quiz_id, other_user.id, self.option_other.id)
+            return {}
+        with mock.patch.object(tallies, 'get_buffered_choices', side_effect=record):
+            counts = tallies.rebuild(self.quiz.id)
+        self.assertDictEqual(counts, {
+            str(self.option_other.id): 2,
+            tallies.TOTAL_FIELD: 2,
+        })
+        self.assertDictEqual(tallies.get_counts(self.quiz.id), counts)
+        conn = get_redis_connection('default')
+        self.assertFalse(conn.exists(tallies.get_rebuilding_key(self.quiz.id)))
+
 
 class APIStudentResponseDetailTestCase(AppTestCase):
 
@@ -31,9 +31,15 @@ class APITokenLogoutTestCase(AppTestCase):
 
         # logout
         self.set_rt(self.user)
+        rt = self.client.cookies[AUTH_COOKIE_REFRESH].value
         res = self.client.post(self.url, {})
         self.assertEqual(res.status_code, 200)
 
         # check cookie
         self.assertEqual(self.client.cookies[AUTH_COOKIE_ACCESS].value, '')
         self.assertEqual(self.client.cookies[AUTH_COOKIE_REFRESH].value, '')
+
+        # check revoked token
+        self.client.cookies[AUTH_COOKIE_REFRESH] = rt
+        res = self.client.post(reverse('app:api_token_refresh'), {})
+        self.assertEqual(res.status_code, 401)
@@ -4,6 +4,7 @@ from rest_framework_simplejwt.tokens import AccessToken
 
 from app.tests.utils import (
     AUTH_COOKIE_ACCESS,
+    AUTH_COOKIE_REFRESH,
     ACCESS_TOKEN_LIFETIME,
     AppTestCase,
 )
@@ -46,3 +47,16 @@ class APITokenRefreshTestCase(AppTestCase):
             at.payload['exp'],
             now_timestamp + ACCESS_TOKEN_LIFETIME.total_seconds() - 1,
         )
+
+    def test_POST_fail__rotated(self):
+
+        # refresh
+        self.set_rt(self.user)
+        rt = self.client.cookies[AUTH_COOKIE_REFRESH].value
+        res = self.client.post(self.url, {})
+        self.assertEqual(res.status_code, 200)
+
+        # reuse the rotated token
+        self.client.cookies[AUTH_COOKIE_REFRESH] = rt
+        res = self.client.post(self.url, {})
+        self.assertEqual(res.status_code, 401)
@@ -1,10 +1,17 @@
+from unittest import mock
+
 from django.db import connection
 from django.urls import reverse
 from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
 
+from app import users
 from app.tests.utils import AppTestCase
 
 
+User = get_user_model()
+
+
 class APIUserMeTestCase(AppTestCase):
 
     url_name = 'app:api_user_me'
@@ -54,6 +61,45 @@ class APIUserMeTestCase(AppTestCase):
         self.user.refresh_from_db()
         self.assertEqual(self.user.username, new_username)
 
+    def test_PATCH_success__username_cached(self):
+
+        # cache authenticated user
+        self.set_at(self.user)
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        with CaptureQueriesContext(connection) as context:
+            res = self.client.get(self.url)
+        self.assertEqual(len(context.captured_queries), 0)
+
+        # update data
+        new_username = self.generate_data()['username']
+        res = self.client.patch(self.url, {
+            'username': new_username,
+        })
+        self.assertEqual(res.status_code, 200)
+
+        # check data
+        res = self.client.get(self.url)
+        self.assertEqual(res.data['username'], new_username)
+
+    def test_PATCH_success__username_cache_race(self):
+
+        # a lookup that read the user before a change is invalidated mid-flight
+        new_username = self.generate_data()['username']
+        load = users.load
+
+        def load_stale(user_id):
+            user = load(user_id)
+            User.objects.filter(id=user_id).update(username=new_username)
+            users.invalidate([user_id])
+            return user
+        with mock.patch.object(users, 'load', side_effect=load_stale):
+            self.assertEqual(users.get(self.user.id).username, self.user.username)
+
+        # the stale copy is not served from the shared cache
+        users.clear()
+        self.assertEqual(users.get(self.user.id).username, new_username)
+
     def test_PATCH_success__password(self):
 
         # update data
@@ -1,6 +1,9 @@
+import asyncio
+
 from django.urls import reverse
-from django.core.cache import cache
+from asgiref.sync import async_to_sync
 
+from app import tickets
 from app.tests.utils import AppTestCase
 
 
@@ -33,7 +36,29 @@ class APIWebsocketTicketTestCase(AppTestCase):
 
         # check ticket
         ticket = res.data['ticket']
-        key = f'websocket:ticket:{ticket}'
-        user_data = cache.get(key)
+        user_data = async_to_sync(tickets.redeem)(ticket)
         self.assertEqual(user_data['user_id'], self.user.id)
         self.assertEqual(user_data['is_staff'], self.user.is_staff)
+
+        # check used ticket
+        self.assertIsNone(async_to_sync(tickets.redeem)(ticket))
+
+    def test_POST_success__redeem_once(self):
+
+        # request ticket
+        self.set_at(self.user)
+        res = self.client.post(self.url, {})
+        ticket = res.data['ticket']
+
+        # redeem concurrently
+        async def redeem_all():
+            return await asyncio.gather(*[
+                tickets.redeem(ticket)
+                for _ in range(10)
+            ])
+        redeemed = [
+            user_data
+            for user_data in async_to_sync(redeem_all)()
+            if user_data is not None
+        ]
+        self.assertEqual(len(redeemed), 1)
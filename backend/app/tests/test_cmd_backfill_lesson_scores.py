@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from app.models import (
+    Lesson,
+    LessonScore,
+)
+from app.tests.utils import AppTestCase
+
+
+class CmdBackfillLessonScoresTestCase(AppTestCase):
+
+    def test_success(self):
+
+        # close a lesson
+        self.lessons[1].state = Lesson.STATE_CLOSED
+        self.lessons[1].save()
+        LessonScore.objects.create(
+            student=self.students[1],
+            lesson=self.lessons[2],
+            answered=9,
+            correct=9,
+        )
+
+        # backfill
+        call_command('backfill_lesson_scores', stdout=StringIO())
+
+        # check data
+        scores = LessonScore.objects.order_by('student__personal_sid')
+        self.assertEqual(len(scores), len(self.students))
+        for score in scores:
+            self.assertEqual(score.lesson_id, self.lessons[1].seq)
+            self.assertEqual(score.answered, 2)
+            self.assertEqual(score.correct, 1)
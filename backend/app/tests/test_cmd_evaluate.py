@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django_redis import get_redis_connection
+
+from app import buffers
+from app.models import (
+    Lesson,
+    Quiz,
+    Response,
+    QuizResult,
+)
+from app.results import get_result_key
+from app.tests.utils import AppTestCase
+
+
+class CmdEvaluateTestCase(AppTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        # close lessons
+        Quiz.objects.update(state=Quiz.STATE_CLOSED)
+        for i in range(1, 2 + 1):
+            self.lessons[i].state = Lesson.STATE_CLOSED
+            self.lessons[i].save()
+
+    def evaluate(self, *args):
+        out = StringIO()
+        call_command('evaluate', *args, stdout=out)
+        for student in self.students.values():
+            student.refresh_from_db()
+        return out.getvalue()
+
+    def test_success(self):
+        self.evaluate()
+        for student in self.students.values():
+            self.assertEqual(student.eval_quiz, 2)
+
+    def test_success__pending_quiz(self):
+
+        # responses to a quiz sent back to pending still count once its lesson is closed
+        quiz = self.quizzes[(1, 1)]
+        quiz.state = Quiz.STATE_PENDING
+        quiz.save(update_fields=['state'])
+        self.evaluate()
+        for student in self.students.values():
+            self.assertEqual(student.eval_quiz, 2)
+
+    def test_success__snapshots(self):
+        self.evaluate()
+        stored_ats = dict(QuizResult.objects.values_list('quiz_id', 'updated_at'))
+        self.assertEqual(len(stored_ats), Quiz.objects.filter(lesson__seq__lte=2).count())
+
+        # only the snapshot of a changed quiz is rewritten
+        response = self.responses[(1, 1, 1)]
+        response.option = self.options[(1, 1, 2)]
+        response.save()
+        self.evaluate()
+        for quiz_id, updated_at in QuizResult.objects.values_list('quiz_id', 'updated_at'):
+            if quiz_id == response.quiz_id:
+                self.assertGreater(updated_at, stored_ats[quiz_id])
+            else:
+                self.assertEqual(updated_at, stored_ats[quiz_id])
+        self.assertEqual(QuizResult.objects.get(quiz_id=response.quiz_id).correct, 0)
+
+    def test_success__dry_run(self):
+        out = self.evaluate('--dry-run')
+        for student in self.students.values():
+            self.assertEqual(student.eval_quiz, 0)
+            self.assertIn(f"{student.personal_sid}: 0 -> 2", out)
+
+    def test_success__dry_run_side_effects(self):
+
+        # leave snapshots and buffered responses alone
+        quiz = self.quizzes[(3, 1)]
+        buffers.push(self.normal_users[1].id, quiz.id, self.options[(3, 1, 1)].id)
+        self.evaluate('--dry-run')
+        self.assertFalse(QuizResult.objects.exists())
+        self.assertIsNone(cache.get(get_result_key(self.quizzes[(1, 1)].id)))
+        conn = get_redis_connection('default')
+        self.assertEqual(conn.hlen(buffers.BUFFER_KEY), 1)
+
+    def test_success__incremental(self):
+        self.evaluate('--incremental')
+
+        # nothing changed
+        out = self.evaluate('--incremental', '--dry-run')
+        self.assertIn("Would update 0 students", out)
+
+        # close another lesson
+        self.lessons[3].state = Lesson.STATE_CLOSED
+        self.lessons[3].save()
+        self.evaluate('--incremental')
+        for student in self.students.values():
+            self.assertEqual(student.eval_quiz, 3)
+
+        # edit a response of a closed lesson
+        Response.objects.filter(
+            user=self.normal_users[1],
+            quiz=self.quizzes[(1, 1)],
+        ).first().delete()
+        response = self.responses[(1, 2, 1)]
+        response.option = self.options[(1, 2, 2)]
+        response.save()
+        self.evaluate('--incremental')
+        self.assertEqual(self.students[1].eval_quiz, 3)
+        self.assertEqual(self.students[2].eval_quiz, 3)
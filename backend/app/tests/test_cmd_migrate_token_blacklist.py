@@ -0,0 +1,33 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from app.blacklist import RedisBlacklist
+from app.tokens import RefreshToken
+from app.tests.utils import AppTestCase
+
+
+class CmdMigrateTokenBlacklistTestCase(AppTestCase):
+
+    def test_fail__not_installed(self):
+        with self.assertRaises(CommandError):
+            call_command('migrate_token_blacklist')
+
+    def test_success__add_many(self):
+
+        # copy blacklisted tokens, skipping expired ones
+        live = RefreshToken.for_user(self.normal_users[1])
+        expired = RefreshToken.for_user(self.normal_users[2])
+        backend = RedisBlacklist()
+        count = backend.add_many([
+            (live['jti'], live['exp']),
+            (expired['jti'], time.time() - 1),
+        ])
+        self.assertEqual(count, 1)
+        self.assertTrue(backend.contains(live))
+        self.assertFalse(backend.contains(expired))
+
+        # blacklisting again is refused
+        self.assertFalse(backend.add(live))
+        self.assertTrue(backend.add(expired))
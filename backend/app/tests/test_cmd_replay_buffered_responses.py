@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django_redis import get_redis_connection
+
+from app import buffers
+from app.models import Response
+from app.tests.utils import AppTestCase
+
+
+class CmdReplayBufferedResponsesTestCase(AppTestCase):
+
+    def test_success(self):
+
+        # set aside rows, one of them answered again since
+        user, user_other = self.normal_users[1], self.normal_users[2]
+        quiz = self.quizzes[(1, 1)]
+        option, option_other = self.options[(1, 1, 1)], self.options[(1, 1, 2)]
+        Response.objects.filter(quiz=quiz).delete()
+        conn = get_redis_connection('default')
+        conn.hset(buffers.DEAD_LETTER_KEY, mapping={
+            f'{user.id}:{quiz.id}': option.id,
+            f'{user_other.id}:{quiz.id}': option.id,
+        })
+        buffers.push(user_other.id, quiz.id, option_other.id)
+
+        # replay
+        out = StringIO()
+        call_command('replay_buffered_responses', stdout=out)
+        self.assertIn("Replayed 2 buffered responses", out.getvalue())
+
+        # check data
+        self.assertFalse(conn.exists(buffers.DEAD_LETTER_KEY))
+        self.assertEqual(Response.objects.get(user=user, quiz=quiz).option_id, option.id)
+        self.assertEqual(Response.objects.get(user=user_other, quiz=quiz).option_id, option_other.id)
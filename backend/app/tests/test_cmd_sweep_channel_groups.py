@@ -0,0 +1,46 @@
+import asyncio
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from channels.layers import get_channel_layer
+from asgiref.sync import async_to_sync
+
+from app import memberships
+from app.consumers import StudentConsumer
+from app.tests.utils import AppTestCase
+
+
+class CmdSweepChannelGroupsTestCase(AppTestCase):
+
+    def test_success(self):
+
+        # prepare a worker that stopped heartbeating
+        channel_layer = get_channel_layer()
+        group_name = StudentConsumer.get_group_names()[0]
+        channel_name = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(group_name, channel_name)
+        with override_settings(CHANNEL_WORKER_TTL=-1):
+            memberships.add(channel_name, [group_name], worker_id='dead')
+
+        # count wasted sends
+        self.assertEqual(memberships.record_wasted([group_name]), 1)
+        self.assertEqual(memberships.get_wasted_total(), 1)
+
+        # sweep
+        out = StringIO()
+        call_command('sweep_channel_groups', stdout=out)
+        self.assertIn("Swept 1 channels", out.getvalue())
+        self.assertEqual(memberships.count_wasted([group_name]), 0)
+        self.assertEqual(memberships.get_dead_worker_ids(), [])
+
+        # swept channels no longer receive group sends
+        async_to_sync(channel_layer.group_send)(group_name, {
+            'type': 'broadcast_live_quiz_data',
+        })
+        with self.assertRaises(asyncio.TimeoutError):
+            async_to_sync(asyncio.wait_for)(
+                channel_layer.receive(channel_name),
+                timeout=0.5,
+            )
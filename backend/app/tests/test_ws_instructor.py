@@ -1,9 +1,20 @@
 from django.urls import reverse
-
-from app.models import Quiz
+from django.test import override_settings
+from asgiref.sync import sync_to_async
+
+from app import presence
+from app.models import (
+    Lesson,
+    Quiz,
+    Response,
+)
 from app.tests.utils import AppTestCase
 
 
+@override_settings(
+    CELERY_TASK_ALWAYS_EAGER=True,
+    CELERY_TASK_EAGER_PROPAGATES=True,
+)
 class WSInstructorTestCase(AppTestCase):
 
     url = '/ws/instructor/'
@@ -183,3 +194,185 @@ class WSInstructorTestCase(AppTestCase):
         # check data
         quiz_data = data['quiz_data']
         self.assertIsNone(quiz_data)
+
+    @override_settings(DASHBOARD_FLUSH_INTERVAL=0)
+    async def test_receive_success__dashboard(self):
+
+        # prepare data
+        self.lesson.state = Lesson.STATE_ACTIVE
+        await self.lesson.asave()
+        self.quiz.state = Quiz.STATE_ACTIVE
+        await self.quiz.asave()
+
+        # connect
+        wsc, _ = await self.get_wsc(self.user, params={
+            'dashboard': 1,
+        })
+        await wsc.receive_json_from()
+
+        # receive snapshot
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'instructor_dashboard',
+        )
+        self.assertEqual(data['quiz']['id'], self.quiz.id)
+        self.assertEqual(len(data['data']), len(self.normal_users))
+
+        # submit response
+        student_user = self.normal_users[1]
+        option = self.options[(1, 1, 2)]
+        self.set_at(student_user)
+        await self.aclient.post(reverse('app:api_student_response-list'), {
+            'quiz': self.quiz.id,
+            'option': option.id,
+        })
+
+        # receive delta
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'instructor_dashboard_delta',
+        )
+        self.assertEqual(len(data['data']), 1)
+        row = data['data'][0]
+        self.assertEqual(
+            row['personal_sid'],
+            self.students[1].personal_sid,
+        )
+        self.assertEqual(row['response']['option_id'], option.id)
+
+    @override_settings(PROGRESS_INTERVAL=0)
+    async def test_receive_success__progress(self):
+
+        # connect
+        wsc, _ = await self.get_wsc(self.user)
+        await wsc.receive_json_from()
+
+        # activate lesson and quiz
+        self.set_at(self.admin)
+        await self.aclient.post(reverse('app:api_instructor_lesson-activate', args=[
+            self.lesson.seq,
+        ]))
+        await wsc.receive_json_from()
+        await self.aclient.post(reverse('app:api_instructor_quiz-activate', args=[
+            self.quiz.id,
+        ]))
+        await wsc.receive_json_from()
+
+        # connect student
+        student_wsc, _ = await self.get_wsc(
+            self.normal_users[1],
+            url='/ws/student/',
+        )
+        await student_wsc.receive_json_from()
+
+        # receive progress
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'instructor_quiz_progress',
+        )
+        self.assertEqual(data['quiz_id'], self.quiz.id)
+        self.assertEqual(data['answered'], len(self.normal_users))
+        self.assertEqual(data['connected'], 1)
+
+        # submit response
+        self.set_at(self.normal_users[1])
+        await self.aclient.post(reverse('app:api_student_response-list'), {
+            'quiz': self.quiz.id,
+            'option': self.options[(1, 1, 2)].id,
+        })
+
+        # receive progress
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'instructor_quiz_progress',
+        )
+        self.assertEqual(data['answered'], len(self.normal_users))
+
+        # disconnect student
+        await student_wsc.disconnect()
+        data = await wsc.receive_json_from()
+        self.assertEqual(data['connected'], 0)
+
+    @override_settings(PROGRESS_INTERVAL=0)
+    async def test_receive_success__presence(self):
+
+        # prepare data
+        student_user = self.normal_users[1]
+        await Response.objects.filter(
+            user=student_user,
+            quiz=self.quiz,
+        ).adelete()
+
+        # connect
+        wsc, _ = await self.get_wsc(self.user, params={
+            'dashboard': 1,
+        })
+        await wsc.receive_json_from()
+        await wsc.receive_json_from()
+
+        # activate lesson and quiz
+        self.set_at(self.admin)
+        await self.aclient.post(reverse('app:api_instructor_lesson-activate', args=[
+            self.lesson.seq,
+        ]))
+        await wsc.receive_json_from()
+        await wsc.receive_json_from()
+        await self.aclient.post(reverse('app:api_instructor_quiz-activate', args=[
+            self.quiz.id,
+        ]))
+        await wsc.receive_json_from()
+        data = await wsc.receive_json_from()
+        self.assertIn(student_user.id, [row['user_id'] for row in data['data']])
+
+        # connect student
+        student_wsc, _ = await self.get_wsc(student_user, url='/ws/student/')
+        await student_wsc.receive_json_from()
+
+        # receive presence
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'instructor_quiz_progress',
+        )
+        self.assertEqual(data['connected'], 1)
+        self.assertEqual(data['online_user_ids'], [student_user.id])
+        self.assertEqual(data['unanswered_user_ids'], [student_user.id])
+        await student_wsc.disconnect()
+
+    async def test_receive_success__presence_tabs(self):
+
+        # connect student twice
+        student_user = self.normal_users[1]
+        student_wscs = []
+        for _ in range(2):
+            student_wsc, _ = await self.get_wsc(student_user, url='/ws/student/')
+            await student_wsc.receive_json_from()
+            student_wscs.append(student_wsc)
+        self.assertEqual(await sync_to_async(presence.count)(), 1)
+
+        # closing one tab keeps the student online
+        await student_wscs[0].disconnect()
+        self.assertEqual(await sync_to_async(presence.count)(), 1)
+        self.assertEqual(await sync_to_async(presence.get_user_ids)(), [student_user.id])
+
+        # closing the last tab drops the student
+        await student_wscs[1].disconnect()
+        self.assertEqual(await sync_to_async(presence.count)(), 0)
+
+    @override_settings(PRESENCE_TTL=-1)
+    async def test_receive_success__presence_expired(self):
+
+        # connect student without heartbeats
+        student_wsc, _ = await self.get_wsc(
+            self.normal_users[1],
+            url='/ws/student/',
+        )
+        await student_wsc.receive_json_from()
+
+        # expired entries are not counted
+        self.assertEqual(await sync_to_async(presence.count)(), 0)
+        await student_wsc.disconnect()
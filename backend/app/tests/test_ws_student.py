@@ -1,7 +1,26 @@
+from django.conf import settings
 from django.urls import reverse
+from django.test import override_settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
 
 from app.models import Quiz
-from app.tests.utils import AppTestCase
+from app.consumers import (
+    StudentConsumer,
+    group_send_all,
+)
+from project.asgi import application
+from project.middlewares.channels import verified_tokens
+from app.tests.utils import (
+    AUTH_COOKIE_ACCESS,
+    WS_CONNECT_TIMEOUT,
+    AppTestCase,
+)
+
+
+User = get_user_model()
 
 
 class WSStudentTestCase(AppTestCase):
@@ -20,6 +39,70 @@ class WSStudentTestCase(AppTestCase):
     async def test_auth_fail(self):
         await self.common_ws_auth_fail()
 
+    async def test_auth_success__cookie(self):
+
+        # connect without a ticket
+        wsc, (connected, _) = await self.get_cookie_wsc(self.user)
+        self.assertTrue(connected)
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'student_live_quiz',
+        )
+        await wsc.disconnect()
+
+        # reconnect with the verified token
+        self.assertEqual(len(verified_tokens), 1)
+        wsc, (connected, _) = await self.get_cookie_wsc(self.user)
+        self.assertTrue(connected)
+        await wsc.disconnect()
+
+    @override_settings(ALLOWED_HOSTS=['localhost'])
+    async def test_auth_success__cookie_origin(self):
+
+        # same-site origin on another port
+        wsc, (connected, _) = await self.get_cookie_wsc(self.user, headers=[
+            (b'origin', b'http://localhost:8080'),
+        ])
+        self.assertTrue(connected)
+        await wsc.disconnect()
+
+    @override_settings(USER_CACHE_TTL=0)
+    async def test_auth_fail__cookie_deactivated(self):
+
+        # connect with a cookie
+        headers = [
+            (b'cookie', f'{AUTH_COOKIE_ACCESS}={AccessToken.for_user(self.user)}'.encode('latin1')),
+        ]
+        wsc = WebsocketCommunicator(application, self.url, headers=headers)
+        connected, _ = await wsc.connect(timeout=WS_CONNECT_TIMEOUT)
+        self.assertTrue(connected)
+        await wsc.disconnect()
+
+        # the same token is refused once the user is deactivated
+        await User.objects.filter(id=self.user.id).aupdate(is_active=False)
+        wsc = WebsocketCommunicator(application, self.url, headers=headers)
+        connected, close_code = await wsc.connect(timeout=WS_CONNECT_TIMEOUT)
+        self.assertFalse(connected)
+        self.assertEqual(close_code, 4001)
+
+    async def test_auth_fail__cookie(self):
+
+        # cross-site origin
+        _, (connected, close_code) = await self.get_cookie_wsc(self.user, headers=[
+            (b'origin', b'https://evil.example.com'),
+        ])
+        self.assertFalse(connected)
+        self.assertEqual(close_code, 4001)
+
+        # invalid token
+        wsc = WebsocketCommunicator(application, self.url, headers=[
+            (b'cookie', b'access=invalid_token'),
+        ])
+        connected, close_code = await wsc.connect(timeout=WS_CONNECT_TIMEOUT)
+        self.assertFalse(connected)
+        self.assertEqual(close_code, 4001)
+
     async def test_receive_success__nothing(self):
 
         # connect
@@ -150,6 +233,30 @@ class WSStudentTestCase(AppTestCase):
         quiz_data = data['quiz_data']
         self.assertIsNone(quiz_data)
 
+        # receive results
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'student_quiz_results',
+        )
+        results_data = data['results_data']
+        self.assertEqual(results_data['quiz_id'], self.quiz.id)
+        self.assertEqual(results_data['orders'], [1, 2])
+        self.assertEqual(results_data['counts'], [1, 1])
+        self.assertEqual(results_data['total'], 2)
+
+        # reconnect
+        await wsc.disconnect()
+        wsc, _ = await self.get_wsc(self.user)
+        data = await wsc.receive_json_from()
+        self.assertIsNone(data['quiz_data'])
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'student_quiz_results',
+        )
+        self.assertEqual(data['results_data'], results_data)
+
     async def test_receive_success__close_quiz(self):
 
         # connect
@@ -181,3 +288,126 @@ class WSStudentTestCase(AppTestCase):
         # check data
         quiz_data = data['quiz_data']
         self.assertIsNone(quiz_data)
+
+    async def test_receive_success__invalidated_quiz(self):
+
+        # activate lesson and quiz
+        self.set_at(self.admin)
+        await self.aclient.post(reverse('app:api_instructor_lesson-activate', args=[
+            self.lesson.seq,
+        ]))
+        await self.aclient.post(reverse('app:api_instructor_quiz-activate', args=[
+            self.quiz.id,
+        ]))
+
+        # receive cached data
+        wsc, _ = await self.get_wsc(self.user)
+        data = await wsc.receive_json_from()
+        self.assertEqual(data['quiz_data']['id'], self.quiz.id)
+        await wsc.disconnect()
+
+        # change quiz outside of the api
+        self.quiz.state = Quiz.STATE_CLOSED
+        await self.quiz.asave()
+
+        # receive refreshed data
+        wsc, _ = await self.get_wsc(self.user)
+        data = await wsc.receive_json_from()
+        self.assertIsNone(data['quiz_data'])
+
+    async def test_receive_success__resume_unchanged(self):
+
+        # connect
+        wsc, _ = await self.get_wsc(self.user)
+        data = await wsc.receive_json_from()
+        version = data['version']
+        await wsc.disconnect()
+
+        # reconnect with the last seen version
+        wsc, _ = await self.get_wsc(self.user, params={
+            'version': version,
+        })
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'student_live_quiz_unchanged',
+        )
+        self.assertEqual(data['version'], version)
+
+    async def test_receive_success__resume_changed(self):
+
+        # connect
+        wsc, _ = await self.get_wsc(self.user)
+        data = await wsc.receive_json_from()
+        version = data['version']
+        await wsc.disconnect()
+
+        # activate lesson and quiz
+        self.set_at(self.admin)
+        await self.aclient.post(reverse('app:api_instructor_lesson-activate', args=[
+            self.lesson.seq,
+        ]))
+        await self.aclient.post(reverse('app:api_instructor_quiz-activate', args=[
+            self.quiz.id,
+        ]))
+
+        # reconnect with the last seen version
+        wsc, _ = await self.get_wsc(self.user, params={
+            'version': version,
+        })
+        data = await wsc.receive_json_from()
+        self.assertEqual(
+            data['type'],
+            'student_live_quiz',
+        )
+        self.assertGreater(data['version'], version)
+        self.assertEqual(data['quiz_data']['id'], self.quiz.id)
+
+    async def test_receive_success__drop_stale(self):
+
+        # activate lesson
+        self.set_at(self.admin)
+        await self.aclient.post(reverse('app:api_instructor_lesson-activate', args=[
+            self.lesson.seq,
+        ]))
+
+        # connect
+        wsc, _ = await self.get_wsc(self.user)
+        data = await wsc.receive_json_from()
+        version = data['version']
+        self.assertGreater(version, 0)
+
+        # broadcast stale data
+        await group_send_all(get_channel_layer(), StudentConsumer.get_group_names(), {
+            'type': 'broadcast_live_quiz_data',
+            'version': version - 1,
+            'text': StudentConsumer.encode_live_quiz_data(None, version - 1),
+        })
+        self.assertTrue(await wsc.receive_nothing())
+
+    async def test_receive_success__shards(self):
+
+        # connect students spread across shard groups
+        wscs = []
+        for user in self.normal_users.values():
+            wsc, _ = await self.get_wsc(user)
+            await wsc.receive_json_from()
+            wscs.append(wsc)
+        self.assertEqual(
+            len(StudentConsumer.get_group_names()),
+            settings.STUDENT_GROUP_SHARDS,
+        )
+
+        # activate lesson
+        self.set_at(self.admin)
+        await self.aclient.post(reverse('app:api_instructor_lesson-activate', args=[
+            self.lesson.seq,
+        ]))
+
+        # every shard receives data
+        for wsc in wscs:
+            data = await wsc.receive_json_from()
+            self.assertEqual(
+                data['type'],
+                'student_live_quiz',
+            )
@@ -1,6 +1,7 @@
 import random
 
 from uuid import uuid4
+from urllib.parse import urlencode
 from datetime import timedelta
 
 from django.conf import settings
@@ -21,6 +22,8 @@ from asgiref.sync import sync_to_async
 from channels.testing import WebsocketCommunicator
 
 from project.asgi import application
+from project.middlewares.channels import verified_tokens
+from app import users
 from app.models import (
     Student,
     Lesson,
@@ -63,6 +66,8 @@ class AppTestCase(TransactionTestCase):
 
         # reset cache
         cache.clear()
+        verified_tokens.clear()
+        users.clear()
 
         # init manager
         self.admin_data = {
@@ -177,16 +182,33 @@ class AppTestCase(TransactionTestCase):
         self.client.cookies[AUTH_COOKIE_REFRESH] = str(rt)
         self.aclient.cookies[AUTH_COOKIE_REFRESH] = str(rt)
 
-    async def get_wsc(self, user):
+    async def get_wsc(self, user, params=None, url=None):
         self.set_at(user)
         res = await self.aclient.post(
             reverse('app:api_websocket_ticket'),
             {},
         )
-        ticket = res.data['ticket']
+        query_string = urlencode({
+            'ticket': res.data['ticket'],
+            **(params or {}),
+        })
         wsc = WebsocketCommunicator(
             application,
-            f'{self.url}?ticket={ticket}',
+            f'{url or self.url}?{query_string}',
+        )
+        connected, close_code = await wsc.connect(timeout=WS_CONNECT_TIMEOUT)
+        return wsc, (connected, close_code)
+
+    async def get_cookie_wsc(self, user, params=None, headers=None):
+        at = AccessToken.for_user(user)
+        query_string = urlencode(params or {})
+        wsc = WebsocketCommunicator(
+            application,
+            f'{self.url}?{query_string}',
+            headers=[
+                (b'cookie', f'{AUTH_COOKIE_ACCESS}={at}'.encode('latin1')),
+                *(headers or []),
+            ],
         )
         connected, close_code = await wsc.connect(timeout=WS_CONNECT_TIMEOUT)
         return wsc, (connected, close_code)
@@ -0,0 +1,57 @@
+import json
+import asyncio
+
+from uuid import uuid4
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+from django_redis import get_redis_connection
+from redis import asyncio as aioredis
+
+
+TICKET_KEY = 'websocket:ticket:{}'
+
+# asyncio connections are bound to the loop that opened them, so each loop gets its own pool
+async_connections = WeakKeyDictionary()
+
+
+def get_ticket_key(ticket):
+    return TICKET_KEY.format(ticket)
+
+
+def issue(user):
+    ticket = str(uuid4())
+    conn = get_redis_connection('default')
+    conn.set(
+        get_ticket_key(ticket),
+        json.dumps({
+            'user_id': user.id,
+            'is_staff': user.is_staff,
+        }),
+        ex=settings.WEBSOCKET_TICKET_TTL,
+    )
+    return ticket
+
+
+def get_async_connection():
+    loop = asyncio.get_running_loop()
+    conn = async_connections.get(loop)
+    if conn is None:
+        options = settings.CACHES['default']['OPTIONS']
+        conn = aioredis.from_url(
+            settings.CACHES['default']['LOCATION'],
+            socket_connect_timeout=options.get('SOCKET_CONNECT_TIMEOUT'),
+            socket_timeout=options.get('SOCKET_TIMEOUT'),
+            **options.get('CONNECTION_POOL_KWARGS', {}),
+        )
+        async_connections[loop] = conn
+    return conn
+
+
+async def redeem(ticket):
+
+    # GETDEL lets exactly one handshake consume a ticket, in a single round trip
+    value = await get_async_connection().getdel(get_ticket_key(ticket))
+    if value is None:
+        return None
+    return json.loads(value)
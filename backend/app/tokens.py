@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+
+from app.blacklist import get_backend
+
+
+class RefreshToken(BaseRefreshToken):
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        if get_backend().contains(self):
+            raise TokenError("Token is blacklisted.")
+
+    def blacklist(self):
+
+        # only the first of concurrent rotations with the same token wins
+        if not get_backend().add(self):
+            raise TokenError("Token is blacklisted.")
@@ -0,0 +1,96 @@
+import time
+import pickle
+
+from uuid import uuid4
+from threading import Lock
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+
+USER_KEY = 'auth:user:{}'
+GENERATION_KEY = 'auth:user:{}:generation'
+
+# user key -> (pickled user, expiry), least recently used first
+local_users = OrderedDict()
+local_lock = Lock()
+
+
+def get_user_key(user_id):
+    return USER_KEY.format(user_id)
+
+
+def get_generation_key(user_id):
+    return GENERATION_KEY.format(user_id)
+
+
+def get_ttl(ttl):
+
+    # a cached user never outlives the access token that looked it up
+    return min(ttl, settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+
+
+def load(user_id):
+    User = get_user_model()
+    return (
+        User.objects
+        .select_related('student')
+        .get(id=user_id)
+    )
+
+
+def remember(key, data, expires_at):
+    with local_lock:
+        local_users[key] = (data, expires_at)
+        local_users.move_to_end(key)
+        while len(local_users) > settings.USER_CACHE_SIZE:
+            local_users.popitem(last=False)
+
+
+def get(user_id):
+
+    # users are kept pickled, so concurrent requests never share an instance
+    key = get_user_key(user_id)
+    now = time.time()
+    with local_lock:
+        entry = local_users.get(key)
+        if entry is not None and entry[1] > now:
+            local_users.move_to_end(key)
+            return pickle.loads(entry[0])
+    data = None
+    if settings.USER_CACHE_SHARED_TTL:
+
+        # entries carry the generation read before loading, so a load that raced an invalidation is never served
+        generation_key = get_generation_key(user_id)
+        entries = cache.get_many([key, generation_key])
+        generation = entries.get(generation_key)
+        entry = entries.get(key)
+        if entry is not None and entry[0] == generation:
+            data = entry[1]
+    if data is None:
+        data = pickle.dumps(load(user_id))
+        if settings.USER_CACHE_SHARED_TTL:
+            cache.set(key, (generation, data), get_ttl(settings.USER_CACHE_SHARED_TTL))
+    remember(key, data, now + get_ttl(settings.USER_CACHE_TTL))
+    return pickle.loads(data)
+
+
+def invalidate(user_ids):
+
+    # token claims carry ids as strings, so entries are keyed by the formatted key
+    keys = [get_user_key(user_id) for user_id in user_ids]
+    with local_lock:
+        for key in keys:
+            local_users.pop(key, None)
+    if settings.USER_CACHE_SHARED_TTL:
+        cache.set_many({
+            get_generation_key(user_id): uuid4().hex
+            for user_id in user_ids
+        }, 2 * settings.USER_CACHE_SHARED_TTL)
+
+
+def clear():
+    with local_lock:
+        local_users.clear()
@@ -29,21 +29,16 @@ from rest_framework_simplejwt.exceptions import (
     TokenError,
 )
 
+from app import tickets
 from app.authentication import Authentication
-from app.models import (
-    Quiz,
-    Student,
-    Response,
-)
 from app.tasks import send_email
+from app.dashboards import get_dashboard_data
 from app.serializers import (
     UserSerializer,
     UserRegistrationSerializer,
     PasswordRequestSerializer,
     PasswordResetSerializer,
     StudentSerializer,
-    QuizSerializer,
-    ResponseSerializer,
 )
 
 
@@ -141,16 +136,7 @@ def api_health(request):
 @authentication_classes([Authentication])
 @permission_classes([IsAuthenticated])
 def api_websocket_ticket(request):
-    ticket = str(uuid4())
-    user = request.user
-    cache.set(
-        f'websocket:ticket:{ticket}',
-        {
-            'user_id': user.id,
-            'is_staff': user.is_staff,
-        },
-        settings.WEBSOCKET_TICKET_TTL,
-    )
+    ticket = tickets.issue(request.user)
     return Res({
         'ticket': ticket,
     }, status=status.HTTP_201_CREATED)
@@ -339,37 +325,4 @@ class APIStudentMeView(APIView):
 @authentication_classes([Authentication])
 @permission_classes([IsAuthenticated, IsAdminUser])
 def api_instructor_dashboard(request):
-    data = []
-    quiz = Quiz.get_live_quiz([
-        Quiz.STATE_ACTIVE,
-        Quiz.STATE_REVIEWING,
-    ])
-    if not quiz:
-        return Res({
-            'quiz': None,
-            'data': [],
-        })
-    students = (
-        Student.objects
-        .select_related('user')
-        .order_by('personal_sid')
-    )
-    for student in students:
-        student_data = StudentSerializer(student).data
-        try:
-            response = (
-                Response.objects
-                .select_related('option')
-                .get(user=student.user, quiz=quiz)
-            )
-            response_data = ResponseSerializer(response).data
-        except Response.DoesNotExist:
-            response_data = None
-        data.append({
-            'student': student_data,
-            'response': response_data,
-        })
-    return Res({
-        'quiz': QuizSerializer(quiz).data,
-        'data': data,
-    })
+    return Res(get_dashboard_data())
@@ -1,7 +1,9 @@
 import logging
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (
     status,
@@ -17,38 +19,126 @@ from rest_framework.permissions import (
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from app import (
+    buffers,
+    grades,
+    memberships,
+    progress,
+    results,
+    snapshots,
+    tallies,
+)
 from app.authentication import Authentication
 from app.models import (
     Lesson,
     Quiz,
+    Option,
     Response,
 )
 from app.serializers import (
     LessonSerializer,
     QuizSerializer,
     ResponseSerializer,
+    ResponseSubmitSerializer,
 )
 from app.consumers import (
     InstructorConsumer,
     StudentConsumer,
+    group_send_all,
+)
+from app.tasks import (
+    flush_responses,
+    grade_lesson,
 )
 
 
-def broadcast_live_quiz_data(group_name, quiz_data):
+def broadcast(group_name, message):
+    broadcast_all([group_name], message)
+
+
+def broadcast_all(group_names, message):
     channel_layer = get_channel_layer()
     if channel_layer is None:
         return
     try:
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'broadcast_live_quiz_data',
-                'quiz_data': quiz_data,
-            }
+        async_to_sync(group_send_all)(
+            channel_layer,
+            group_names,
+            message,
         )
     except Exception as e:
         logger = logging.getLogger('channels')
-        logger.error(f"Failed to broadcast live quiz data: {e}")
+        logger.error(f"Failed to broadcast {message['type']}: {e}")
+
+
+def broadcast_live_quiz_data(consumer_class, quiz_data, version):
+    group_names = consumer_class.get_group_names()
+    broadcast_all(group_names, {
+        'type': 'broadcast_live_quiz_data',
+        'version': version,
+        'text': consumer_class.encode_live_quiz_data(quiz_data, version),
+    })
+    memberships.record_wasted(group_names)
+
+
+def publish_live_quiz_data(instructor_quiz_data, student_quiz_data):
+    version = snapshots.get_version()
+    snapshots.put(snapshots.INSTRUCTOR_KEY, instructor_quiz_data, version)
+    snapshots.put(snapshots.STUDENT_KEY, student_quiz_data, version)
+    broadcast_live_quiz_data(
+        InstructorConsumer,
+        instructor_quiz_data,
+        version,
+    )
+    broadcast_live_quiz_data(
+        StudentConsumer,
+        student_quiz_data,
+        version,
+    )
+    return version
+
+
+def publish_quiz_results(quiz, results_data, version):
+    results_data = {
+        'quiz_id': quiz.id,
+        **results_data,
+    }
+    snapshots.put(snapshots.STUDENT_RESULTS_KEY, results_data, version)
+    broadcast_all(StudentConsumer.get_group_names(), {
+        'type': 'broadcast_quiz_results',
+        'version': version,
+        'text': StudentConsumer.encode_quiz_results(results_data, version),
+    })
+
+
+def grade_lessons(lesson_ids):
+    grades.invalidate_quiz_count()
+    lesson_ids = sorted(lesson_ids)
+    transaction.on_commit(lambda: enqueue_grading(lesson_ids))
+
+
+def enqueue_grading(lesson_ids):
+    for lesson_id in lesson_ids:
+        try:
+            grade_lesson.delay(lesson_id)
+        except Exception as e:
+            logger = logging.getLogger('django')
+            logger.error(f"Failed to enqueue grading of lesson {lesson_id}: {e}")
+
+
+def broadcast_progress():
+    if progress.should_notify():
+        broadcast(InstructorConsumer.GROUP_NAME, {
+            'type': 'broadcast_progress',
+        })
+
+
+def broadcast_dashboard_response(student, response_data):
+    broadcast(InstructorConsumer.DASHBOARD_GROUP_NAME, {
+        'type': 'broadcast_dashboard_response',
+        'personal_sid': student.personal_sid,
+        'response': response_data,
+    })
 
 
 class InstructorLessonViewSet(viewsets.ModelViewSet):
@@ -70,28 +160,42 @@ class InstructorLessonViewSet(viewsets.ModelViewSet):
     def activate(self, request, *args, **kwargs):
         with transaction.atomic():
             lesson = self.get_object()
-            Lesson.objects.filter(seq__lt=lesson.seq).update(
+            closing_lessons = Lesson.objects.filter(seq__lt=lesson.seq).exclude(
+                state=Lesson.STATE_CLOSED,
+            )
+            graded_lesson_ids = set(closing_lessons.values_list('seq', flat=True))
+            closing_lessons.update(
                 state=Lesson.STATE_CLOSED,
+                updated_at=timezone.now(),
             )
-            Lesson.objects.filter(seq__gt=lesson.seq).update(
+            reopening_lessons = Lesson.objects.filter(seq__gt=lesson.seq).exclude(
                 state=Lesson.STATE_PENDING,
             )
+            graded_lesson_ids.update(reopening_lessons.values_list('seq', flat=True))
+            reopening_lessons.update(
+                state=Lesson.STATE_PENDING,
+                updated_at=timezone.now(),
+            )
+            if lesson.state == Lesson.STATE_CLOSED:
+                graded_lesson_ids.add(lesson.seq)
             lesson.state = Lesson.STATE_ACTIVE
             lesson.save()
-            Quiz.objects.filter(
+            closing_quizzes = Quiz.objects.filter(
                 state__in=[
                     Quiz.STATE_ACTIVE,
                     Quiz.STATE_REVIEWING,
                 ],
-            ).update(state=Quiz.STATE_CLOSED)
-        broadcast_live_quiz_data(
-            InstructorConsumer.GROUP_NAME,
-            None,
-        )
-        broadcast_live_quiz_data(
-            StudentConsumer.GROUP_NAME,
-            None,
+            )
+            graded_lesson_ids.update(
+                closing_quizzes.values_list('lesson_id', flat=True)
+            )
+            closing_quizzes.update(state=Quiz.STATE_CLOSED)
+        buffers.flush()
+        grade_lessons(graded_lesson_ids)
+        snapshots.prewarm_payloads(
+            lesson.quizzes.prefetch_related('options')
         )
+        publish_live_quiz_data(None, None)
         return Res({
             'message': f"Lesson {lesson.seq} is activated."
         }, status=status.HTTP_200_OK)
@@ -100,28 +204,42 @@ class InstructorLessonViewSet(viewsets.ModelViewSet):
     def close(self, request, *args, **kwargs):
         lesson = self.get_object()
         with transaction.atomic():
-            Lesson.objects.filter(seq__lt=lesson.seq).update(
+            closing_lessons = Lesson.objects.filter(seq__lt=lesson.seq).exclude(
                 state=Lesson.STATE_CLOSED,
             )
-            Lesson.objects.filter(seq__gt=lesson.seq).update(
+            graded_lesson_ids = set(closing_lessons.values_list('seq', flat=True))
+            closing_lessons.update(
+                state=Lesson.STATE_CLOSED,
+                updated_at=timezone.now(),
+            )
+            reopening_lessons = Lesson.objects.filter(seq__gt=lesson.seq).exclude(
+                state=Lesson.STATE_PENDING,
+            )
+            graded_lesson_ids.update(reopening_lessons.values_list('seq', flat=True))
+            reopening_lessons.update(
                 state=Lesson.STATE_PENDING,
+                updated_at=timezone.now(),
             )
             lesson.state = Lesson.STATE_CLOSED
             lesson.save()
-            Quiz.objects.filter(
+            closing_quizzes = Quiz.objects.filter(
                 state__in=[
                     Quiz.STATE_ACTIVE,
                     Quiz.STATE_REVIEWING,
                 ],
-            ).update(state=Quiz.STATE_CLOSED)
-        broadcast_live_quiz_data(
-            StudentConsumer.GROUP_NAME,
-            None,
-        )
-        broadcast_live_quiz_data(
-            InstructorConsumer.GROUP_NAME,
-            None,
+            )
+            graded_lesson_ids.update(
+                closing_quizzes.values_list('lesson_id', flat=True)
+            )
+            closing_quizzes.update(state=Quiz.STATE_CLOSED)
+        buffers.flush()
+        results.store(
+            lesson.quizzes
+            .filter(state=Quiz.STATE_CLOSED)
+            .values_list('id', flat=True)
         )
+        grade_lessons(graded_lesson_ids | {lesson.seq})
+        publish_live_quiz_data(None, None)
         return Res({
             'message': f"Lesson {lesson.seq} is closed."
         }, status=status.HTTP_200_OK)
@@ -147,6 +265,13 @@ class InstructorQuizViewSet(viewsets.ModelViewSet):
     ordering_fields = ['order']
     ordering = ['order']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['activate', 'review', 'close', 'results']:
+            # payloads and results are cached, so options are not needed here
+            queryset = queryset.prefetch_related(None)
+        return queryset
+
     def create(self, request, *args, **kwargs):
         return Res({}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
@@ -154,30 +279,31 @@ class InstructorQuizViewSet(viewsets.ModelViewSet):
     def activate(self, request, *args, **kwargs):
         quiz = self.get_object()
         with transaction.atomic():
-            Quiz.objects.filter(
+            closing_quizzes = Quiz.objects.filter(
                 lesson=quiz.lesson,
                 order__lt=quiz.order,
-            ).update(state=Quiz.STATE_CLOSED)
+            ).exclude(
+                state=Quiz.STATE_CLOSED,
+            )
+            closing_quiz_ids = list(closing_quizzes.values_list('id', flat=True))
+            closing_quizzes.update(state=Quiz.STATE_CLOSED)
             Quiz.objects.filter(
                 lesson=quiz.lesson,
                 order__gt=quiz.order,
             ).update(state=Quiz.STATE_PENDING)
             quiz.state = Quiz.STATE_ACTIVE
-            quiz.save()
-        instructor_quiz_data = QuizSerializer(quiz).data
-        student_quiz_data = QuizSerializer(
-            instance=quiz,
-            context={
-                'hide_answer': True,
-            },
-        ).data
-        broadcast_live_quiz_data(
-            InstructorConsumer.GROUP_NAME,
-            instructor_quiz_data,
-        )
-        broadcast_live_quiz_data(
-            StudentConsumer.GROUP_NAME,
-            student_quiz_data,
+            quiz.save(update_fields=['state', 'updated_at'])
+
+        # quizzes skipped past are closed too, so they get their snapshots like an explicit close
+        if closing_quiz_ids:
+            buffers.flush()
+            results.store(closing_quiz_ids)
+        results.discard(quiz.id)
+        tallies.rebuild(quiz.id)
+        payload = snapshots.get_payload(quiz)
+        publish_live_quiz_data(
+            payload['instructor'],
+            payload['student'],
         )
         return Res({
             'message': f"Quiz {quiz.order} is activated."
@@ -187,25 +313,29 @@ class InstructorQuizViewSet(viewsets.ModelViewSet):
     def review(self, request, *args, **kwargs):
         quiz = self.get_object()
         with transaction.atomic():
-            Quiz.objects.filter(
+            closing_quizzes = Quiz.objects.filter(
                 lesson=quiz.lesson,
                 order__lt=quiz.order,
-            ).update(state=Quiz.STATE_CLOSED)
+            ).exclude(
+                state=Quiz.STATE_CLOSED,
+            )
+            closing_quiz_ids = list(closing_quizzes.values_list('id', flat=True))
+            closing_quizzes.update(state=Quiz.STATE_CLOSED)
             Quiz.objects.filter(
                 lesson=quiz.lesson,
                 order__gt=quiz.order,
             ).update(state=Quiz.STATE_PENDING)
             quiz.state = Quiz.STATE_REVIEWING
-            quiz.save()
-        instructor_quiz_data = QuizSerializer(quiz).data
-        broadcast_live_quiz_data(
-            InstructorConsumer.GROUP_NAME,
-            instructor_quiz_data,
-        )
-        broadcast_live_quiz_data(
-            StudentConsumer.GROUP_NAME,
+            quiz.save(update_fields=['state', 'updated_at'])
+        buffers.flush()
+        results.store(closing_quiz_ids)
+        results_data = results.freeze(quiz)
+        payload = snapshots.get_payload(quiz)
+        version = publish_live_quiz_data(
+            payload['instructor'],
             None,
         )
+        publish_quiz_results(quiz, results_data, version)
         return Res({
             'message': f"Starting to review Quiz {quiz.order}."
         }, status=status.HTTP_200_OK)
@@ -214,24 +344,23 @@ class InstructorQuizViewSet(viewsets.ModelViewSet):
     def close(self, request, *args, **kwargs):
         quiz = self.get_object()
         with transaction.atomic():
-            Quiz.objects.filter(
+            closing_quizzes = Quiz.objects.filter(
                 lesson=quiz.lesson,
                 order__lt=quiz.order,
-            ).update(state=Quiz.STATE_CLOSED)
+            ).exclude(
+                state=Quiz.STATE_CLOSED,
+            )
+            closing_quiz_ids = list(closing_quizzes.values_list('id', flat=True))
+            closing_quizzes.update(state=Quiz.STATE_CLOSED)
             Quiz.objects.filter(
                 lesson=quiz.lesson,
                 order__gt=quiz.order,
             ).update(state=Quiz.STATE_PENDING)
             quiz.state = Quiz.STATE_CLOSED
-            quiz.save()
-        broadcast_live_quiz_data(
-            InstructorConsumer.GROUP_NAME,
-            None,
-        )
-        broadcast_live_quiz_data(
-            StudentConsumer.GROUP_NAME,
-            None,
-        )
+            quiz.save(update_fields=['state', 'updated_at'])
+        buffers.flush()
+        results.store(closing_quiz_ids + [quiz.id])
+        publish_live_quiz_data(None, None)
         return Res({
             'message': f"Quiz {quiz.order} is closed."
         }, status=status.HTTP_200_OK)
@@ -243,22 +372,7 @@ class InstructorQuizViewSet(viewsets.ModelViewSet):
             return Res({
                 'message': f"Quiz {quiz.order} is not under review."
             }, status=status.HTTP_400_BAD_REQUEST)
-        options = (
-            quiz.options
-            .prefetch_related('responses')
-            .order_by('order')
-        )
-        orders = []
-        counts = []
-        for option in options:
-            orders.append(option.order)
-            counts.append(option.responses.count())
-        total = Response.objects.filter(quiz=quiz).count()
-        return Res({
-            'orders': orders,
-            'counts': counts,
-            'total': total,
-        }, status=status.HTTP_200_OK)
+        return Res(results.get_frozen(quiz), status=status.HTTP_200_OK)
 
 
 class StudentResponseViewSet(viewsets.ModelViewSet):
@@ -294,14 +408,34 @@ class StudentResponseViewSet(viewsets.ModelViewSet):
             )
         )
 
+    def get_serializer_class(self):
+        if self.action == 'create':
+            return ResponseSubmitSerializer
+        return ResponseSerializer
+
     def perform_create(self, serializer):
-        quiz = serializer.validated_data['quiz']
-        option = serializer.validated_data['option']
-        response, _ = Response.objects.update_or_create(
-            user=self.request.user,
-            quiz=quiz,
-            defaults={
-                'option': option,
-            },
+        user = self.request.user
+        quiz_id = serializer.validated_data['quiz']
+        option = Option(
+            id=serializer.validated_data['option'],
+            quiz_id=quiz_id,
+            order=serializer.validated_data['option_order'],
         )
+        if settings.RESPONSE_WRITE_BEHIND:
+            if buffers.push(user.id, quiz_id, option.id):
+                flush_responses.apply_async(
+                    countdown=settings.RESPONSE_FLUSH_INTERVAL,
+                )
+            response = Response(
+                user=user,
+                quiz_id=quiz_id,
+                option=option,
+            )
+        else:
+            response = Response.objects.upsert(user, quiz_id, option)
         serializer.instance = response
+        tallies.record(quiz_id, user.id, option.id)
+        broadcast_progress()
+        student = getattr(user, 'student', None)
+        if student:
+            broadcast_dashboard_response(student, serializer.data)
@@ -1,32 +1,110 @@
-from urllib.parse import parse_qsl
+import time
 
-from asgiref.sync import sync_to_async
-from django.db import close_old_connections
-from django.core.cache import cache
+from urllib.parse import (
+    parse_qsl,
+    urlparse,
+)
+
+from django.conf import settings
+from django.http import parse_cookie
+from django.http.request import (
+    validate_host,
+    split_domain_port,
+)
+from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from channels.exceptions import DenyConnection
 
+from app import tickets
+
+
+# access token -> (user data, expiry), verified at most once per USER_CACHE_TTL in each worker process
+verified_tokens = {}
+
+
+def remember_token(token, user_data, expires_at):
+    now = time.time()
+    if len(verified_tokens) >= settings.WEBSOCKET_TOKEN_CACHE_SIZE:
+        for stale_token in [
+            stale_token
+            for stale_token, (_, stale_expires_at) in verified_tokens.items()
+            if stale_expires_at <= now
+        ]:
+            del verified_tokens[stale_token]
+    while len(verified_tokens) >= settings.WEBSOCKET_TOKEN_CACHE_SIZE:
+        del verified_tokens[next(iter(verified_tokens))]
+    verified_tokens[token] = (user_data, expires_at)
+
 
 class ChannelsJWTAuthMiddleware(BaseMiddleware):
 
     def __init__(self, inner):
         self.inner = inner
 
-    async def auth(self, query_string):
-        query_params = dict(parse_qsl(query_string))
-        ticket = query_params.get('ticket')
-        key = f'websocket:ticket:{ticket}'
-        user_data = await sync_to_async(cache.get)(key)
+    async def auth(self, scope):
+        query_params = dict(parse_qsl(scope['query_string'].decode('utf-8')))
+        if 'ticket' in query_params:
+            return await self.auth_ticket(query_params['ticket'])
+        return await self.auth_cookie(dict(scope['headers']))
+
+    async def auth_ticket(self, ticket):
+        user_data = await tickets.redeem(ticket)
         if user_data is None:
             raise DenyConnection("Invalid ticket.")
-        await sync_to_async(cache.delete)(key)
         return user_data
 
+    async def auth_cookie(self, headers):
+
+        # cookies ride along with cross-site handshakes, so browsers must come from an allowed host
+        origin = headers.get(b'origin')
+        if origin is not None:
+            domain, _ = split_domain_port(urlparse(origin.decode('latin1')).netloc)
+            if not domain or not validate_host(domain, settings.ALLOWED_HOSTS):
+                raise DenyConnection("Invalid origin.")
+
+        cookies = parse_cookie(headers.get(b'cookie', b'').decode('latin1'))
+        token = cookies.get(settings.SIMPLE_JWT['AUTH_COOKIE_ACCESS'])
+        if not token:
+            raise DenyConnection("Invalid ticket.")
+        entry = verified_tokens.get(token)
+        if entry is not None and entry[1] > time.time():
+            return entry[0]
+
+        # imported lazily, since this module is loaded before the app registry
+        from rest_framework_simplejwt.tokens import AccessToken  # noqa: F401
+        from rest_framework_simplejwt.exceptions import TokenError  # noqa: F401
+        try:
+            at = AccessToken(token)
+        except TokenError:
+            raise DenyConnection("Invalid token.")
+        user_data = await self.get_user_data(at['user_id'])
+        if user_data is None:
+            raise DenyConnection("Invalid token.")
+
+        # re-checked every few seconds, so deactivated users don't keep connecting until the token expires
+        remember_token(token, user_data, min(at['exp'], time.time() + settings.USER_CACHE_TTL))
+        return user_data
+
+    @database_sync_to_async
+    def get_user_data(self, user_id):
+        from django.contrib.auth import get_user_model  # noqa: F401
+        User = get_user_model()
+        user = (
+            User.objects
+            .filter(id=user_id, is_active=True)
+            .values('id', 'is_staff')
+            .first()
+        )
+        if user is None:
+            return None
+        return {
+            'user_id': user['id'],
+            'is_staff': user['is_staff'],
+        }
+
     async def __call__(self, scope, receive, send):
-        close_old_connections()
-        query_string = scope['query_string'].decode('utf-8')
         try:
-            scope['user_data'] = await self.auth(query_string)
+            scope['user_data'] = await self.auth(scope)
         except DenyConnection as e:
             await send({
                 'type': 'websocket.close',
@@ -15,6 +15,9 @@ class JWTCookieMiddleware:
                 at = AccessToken(token)
                 _ = at.payload.get('user_id')
                 request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+                # reused by app.authentication.Authentication instead of decoding again
+                request.validated_token = at
             except TokenError:
                 pass
         response = self.get_response(request)
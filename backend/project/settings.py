@@ -247,6 +247,19 @@ CACHES = {
     },
 }
 
+# tally
+TALLY_TTL = 60 * 60 * 24
+
+# live quiz
+LIVE_QUIZ_SNAPSHOT_TTL = 60 * 60
+
+# response
+try:
+    RESPONSE_WRITE_BEHIND = bool(int(getenv('RESPONSE_WRITE_BEHIND', False)))
+except ValueError:
+    RESPONSE_WRITE_BEHIND = False
+RESPONSE_FLUSH_INTERVAL = 1
+
 # session
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -264,9 +277,20 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_ALWAYS_EAGER = False
 CELERY_TASK_EAGER_PROPAGATES = False
+CELERY_TASK_TRACK_STARTED = True
+CELERY_TASK_SEND_SENT_EVENT = True
+CELERY_WORKER_SEND_TASK_EVENTS = True
 
 # channels
 WEBSOCKET_TICKET_TTL = 600
+WEBSOCKET_TOKEN_CACHE_SIZE = 10000
+DASHBOARD_FLUSH_INTERVAL = 0.5
+PROGRESS_INTERVAL = 0.25
+PRESENCE_TTL = 90
+PRESENCE_HEARTBEAT_INTERVAL = 30
+CHANNEL_WORKER_TTL = 60
+CHANNEL_SWEEP_INTERVAL = 20
+STUDENT_GROUP_SHARDS = 4
 CHANNEL_DB = int(getenv('CHANNEL_DB', 3))
 CHANNEL_URL = f"redis://:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}/{CHANNEL_DB}"
 CHANNEL_LAYERS = {
@@ -310,7 +334,13 @@ SIMPLE_JWT = {
     'AUTH_COOKIE_PATH': '/',
     'AUTH_COOKIE_SAMESITE': 'Lax',
     'LEEWAY': 0,
+    'TOKEN_REFRESH_SERIALIZER': 'app.serializers.TokenRefreshSerializer',
+    'TOKEN_BLACKLIST_SERIALIZER': 'app.serializers.TokenBlacklistSerializer',
 }
+TOKEN_BLACKLIST_BACKEND = 'app.blacklist.RedisBlacklist'
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 5
+USER_CACHE_SHARED_TTL = 60
 
 # host
 ALLOWED_HOSTS = getenv('ALLOWED_HOSTS', 'localhost').split(',')
@@ -7,6 +7,9 @@ import {
 } from '@/constants'
 
 
+let refreshing: Promise<unknown> | null = null
+
+
 export const useAuthStore = defineStore('auth', {
   state: () => ({
     username: localStorage.getItem(AUTH_USERNAME_KEY) as string || '',
@@ -23,9 +26,14 @@ export const useAuthStore = defineStore('auth', {
       localStorage.setItem(AUTH_USERNAME_KEY, username)
     },
     async refreshToken () {
-      const res = await axios.post('/api/token/refresh/', {}, {
-        withCredentials: true
-      })
+      if (!refreshing) {
+        refreshing = axios.post('/api/token/refresh/', {}, {
+          withCredentials: true
+        }).finally(() => {
+          refreshing = null
+        })
+      }
+      await refreshing
     },
     async logout () {
       try {